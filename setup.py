@@ -17,7 +17,10 @@ INSTALL_REQUIRES = (
     'pydantic',
     'pymongo',
     'cachetools',
-    'mappymatch'
+    'mappymatch',
+    'zstandard',
+    'mapbox-vector-tile',
+    'prometheus_client'
 )
 
 setup(
@@ -35,7 +38,8 @@ setup(
         'console_scripts': [
             'via_pull_journeys = via.bin.pull_external_journeys:main',
             'via_generate_geojson = via.bin.generate_geojson:main',
-            'via_backup_raw_journeys = via.bin.backup_raw_journeys:main'
+            'via_backup_raw_journeys = via.bin.backup_raw_journeys:main',
+            'via_generation_worker = via.bin.generation_worker:main'
         ]
     }
 )
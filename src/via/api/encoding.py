@@ -0,0 +1,143 @@
+import asyncio
+import io
+import zlib
+from itertools import islice
+from typing import Any, Callable, Iterable, Mapping
+
+import numpy
+import ujson
+import zstandard
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+from via.settings import MAX_REQUEST_BODY_BYTES
+
+# time, acc, lat, lng as little endian float64, nan where missing
+PACKED_DTYPE = numpy.dtype("<f8")
+PACKED_COLUMNS = ("time", "acc", "lat", "lng")
+PACKED_ROW_BYTES = PACKED_DTYPE.itemsize * len(PACKED_COLUMNS)
+
+
+def _decompress_zlib(body: bytes, wbits: int) -> bytes:
+    decompressor = zlib.decompressobj(wbits)
+    data = decompressor.decompress(body, MAX_REQUEST_BODY_BYTES)
+    if decompressor.unconsumed_tail:
+        raise HTTPException(status_code=413, detail="decompressed body too large")
+    return data
+
+
+def _decompress_zstd(body: bytes) -> bytes:
+    with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body)) as reader:
+        data = reader.read(MAX_REQUEST_BODY_BYTES + 1)
+    if len(data) > MAX_REQUEST_BODY_BYTES:
+        raise HTTPException(status_code=413, detail="decompressed body too large")
+    return data
+
+
+DECOMPRESSORS = {
+    "gzip": lambda body: _decompress_zlib(body, 16 + zlib.MAX_WBITS),
+    "deflate": lambda body: _decompress_zlib(body, zlib.MAX_WBITS),
+    "zstd": _decompress_zstd,
+}
+
+
+def decompress(body: bytes, content_encoding: str) -> bytes:
+    """
+    Undo the Content-Encoding of a request body
+
+    :param body:
+    :param content_encoding: value of the Content-Encoding header, may be
+        comma separated if applied more than once
+    """
+    encodings = [
+        encoding.strip().lower()
+        for encoding in content_encoding.split(",")
+        if encoding.strip()
+    ]
+    for encoding in reversed(encodings):
+        if encoding == "identity":
+            continue
+        if encoding not in DECOMPRESSORS:
+            raise HTTPException(
+                status_code=415, detail=f"unsupported content encoding: {encoding}"
+            )
+        try:
+            body = DECOMPRESSORS[encoding](body)
+        except (zlib.error, zstandard.ZstdError) as ex:
+            raise HTTPException(
+                status_code=400, detail=f"could not decompress body: {ex}"
+            )
+    return body
+
+
+class DecompressingRequest(Request):
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if "content-encoding" in self.headers:
+                # Can be up to MAX_REQUEST_BODY_BYTES so not on the event loop
+                body = await asyncio.to_thread(
+                    decompress, body, self.headers["content-encoding"]
+                )
+            self._body = body
+        return self._body
+
+
+class DecompressingRoute(APIRoute):
+    """
+    Route which accepts gzip / deflate / zstd encoded request bodies
+    """
+
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            request = DecompressingRequest(request.scope, request.receive)
+            return await original_route_handler(request)
+
+        return route_handler
+
+
+def decode_packed_journey_data(body: bytes) -> Mapping[str, numpy.ndarray]:
+    """
+    Decode journey data sent as packed rows of time, acc, lat, lng (float64,
+    little endian, nan where missing)
+
+    :return: {"time": arr, "acc": arr, "lat": arr, "lng": arr}
+    """
+    if len(body) % PACKED_ROW_BYTES != 0:
+        raise ValueError(
+            f"packed data must be a multiple of {PACKED_ROW_BYTES} bytes, got {len(body)}"
+        )
+
+    rows = numpy.frombuffer(body, dtype=PACKED_DTYPE).reshape(-1, len(PACKED_COLUMNS))
+    return {name: rows[:, idx] for idx, name in enumerate(PACKED_COLUMNS)}
+
+
+def encode_packed_journey_data(
+    time: numpy.ndarray, acc: numpy.ndarray, lat: numpy.ndarray, lng: numpy.ndarray
+) -> bytes:
+    """
+    Inverse of decode_packed_journey_data, for clients / tests
+    """
+    return (
+        numpy.column_stack([time, acc, lat, lng])
+        .astype(PACKED_DTYPE, copy=False)
+        .tobytes()
+    )
+
+
+def stream_json_list(items: Iterable[Any], chunk_size: int = 1000):
+    """
+    Stream items as a json list without holding them all in memory
+    """
+    items = iter(items)
+    yield "["
+    separator = ""
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            break
+        yield separator + ujson.dumps(chunk)[1:-1]
+        separator = ","
+    yield "]"
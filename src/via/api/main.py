@@ -1,20 +1,46 @@
-import threading
-import traceback
+import datetime
+import time
+from contextlib import asynccontextmanager
 from typing import List, Optional, Union
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from pydantic import BaseModel
 
 from via import logger
-from via.models.journey import Journey
-from via.db import db
+from via.api.encoding import (
+    DecompressingRoute,
+    decode_packed_journey_data,
+    stream_json_list,
+)
+from via.api.single_flight import SingleFlight
+from via.validation import (
+    arrays_to_raw_data,
+    validate_journey_arrays,
+    validate_journey_data,
+)
+from via import jobs
+from via import metrics
+from via.db import async_db
 from via.constants import EMPTY_GEOJSON
+from via.settings import (
+    GEOJSON_GENERATE_WAIT,
+    MAX_GEOJSON_AGE,
+    TILE_MIN_ZOOM,
+    TILE_MAX_ZOOM,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await async_db.ensure_indexes()
+    yield
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.router.route_class = DecompressingRoute
 
 origins = ["*"]
 
@@ -27,6 +53,32 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    start = time.monotonic()
+    # An unhandled error becomes a 500 after the middleware
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route", None)
+        metrics.REQUEST_SECONDS.labels(
+            method=request.method,
+            # The route template rather than the path so tiles etc don't blow
+            # up the number of series
+            route=route.path if route is not None else "unmatched",
+            status_code=status_code,
+        ).observe(time.monotonic() - start)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    body, content_type = await async_db.run(metrics.render)
+    return Response(content=body, media_type=content_type)
+
+
 class RawJourneyDataPoint(BaseModel):
     acc: Union[float, int]
     gps: List[Union[int, float]]
@@ -49,93 +101,295 @@ async def create_journey(raw_journey: RawJourney):
     Simply dumps this journey into Mongo for now.
     """
 
-    result = db.raw_journeys.find_one({"uuid": raw_journey.uuid})
+    journey_data = raw_journey.dict()
 
-    if not result:
-        # Validate
-        Journey(
-            data=raw_journey.dict()["data"],
-            transport_type=raw_journey.transport_type,
-            suspension=raw_journey.suspension,
-            version=raw_journey.version,
-        )
+    try:
+        await async_db.run(validate_journey_data, journey_data["data"])
+    except ValueError as ex:
+        metrics.count_ingest("push_journey", 422)
+        return JSONResponse(status_code=422, content={"message": f"invalid: {ex}"})
+
+    if await async_db.insert_raw_journey(journey_data):
+        metrics.count_ingest("push_journey", 201)
+        return JSONResponse(status_code=201, content={"message": "created"})
+    else:
+        metrics.count_ingest("push_journey", 409)
+        return JSONResponse(status_code=409, content={"message": "already exists"})
+
+
+@app.post("/push_journey/packed")
+async def create_packed_journey(
+    request: Request,
+    uuid: str,
+    device: str,
+    version: Optional[str] = "1.0",
+    transport_type: Optional[str] = "bike",
+    suspension: Optional[bool] = False,
+    is_partial: Optional[bool] = False,
+):
+    """
+    Same as /push_journey but the body is the journey data packed as rows of
+    time, acc, lat, lng (float64, little endian, nan where missing) with
+    everything else in the query string. Much smaller and quicker to parse
+    than json for long journeys.
+    """
+
+    try:
+        arrays = decode_packed_journey_data(await request.body())
+        await async_db.run(validate_journey_arrays, **arrays)
+    except ValueError as ex:
+        metrics.count_ingest("push_journey_packed", 422)
+        return JSONResponse(status_code=422, content={"message": f"invalid: {ex}"})
 
-        db.raw_journeys.insert_one(raw_journey.dict())
+    journey_data = {
+        "version": version,
+        "uuid": uuid,
+        "device": device,
+        "data": await async_db.run(arrays_to_raw_data, **arrays),
+        "transport_type": transport_type,
+        "suspension": suspension,
+        "is_partial": is_partial,
+    }
+
+    if await async_db.insert_raw_journey(journey_data):
+        metrics.count_ingest("push_journey_packed", 201)
         return JSONResponse(status_code=201, content={"message": "created"})
     else:
+        metrics.count_ingest("push_journey_packed", 409)
         return JSONResponse(status_code=409, content={"message": "already exists"})
 
 
+@app.post("/push_journeys")
+async def create_journeys(raw_journeys: List[RawJourney]):
+    """
+    Dump many journeys into Mongo at once, for clients syncing a backlog
+    of journeys. Existing uuids are found with a single query and all new
+    journeys are written with a single insert-if-absent bulk write.
+
+    Returns the status of each journey in the order they were given, using
+    the same status codes / messages as /push_journey
+    """
+
+    existing_uuids = set(
+        result["uuid"]
+        for result in await async_db.raw_journeys.find(
+            {"uuid": {"$in": [raw_journey.uuid for raw_journey in raw_journeys]}},
+            {"uuid": 1, "_id": 0},
+        )
+    )
+
+    results = []
+    to_insert = []
+    to_insert_results = []
+    for raw_journey in raw_journeys:
+        if raw_journey.uuid in existing_uuids:
+            results.append(
+                {
+                    "uuid": raw_journey.uuid,
+                    "status_code": 409,
+                    "message": "already exists",
+                }
+            )
+            continue
+
+        journey_data = raw_journey.dict()
+
+        try:
+            await async_db.run(validate_journey_data, journey_data["data"])
+        except ValueError as ex:
+            logger.warning("Invalid journey %s: %s", raw_journey.uuid, ex)
+            results.append(
+                {
+                    "uuid": raw_journey.uuid,
+                    "status_code": 422,
+                    "message": f"invalid: {ex}",
+                }
+            )
+            continue
+
+        # So duplicates within the one request are only inserted once
+        existing_uuids.add(raw_journey.uuid)
+
+        to_insert.append(journey_data)
+        to_insert_results.append({"uuid": raw_journey.uuid})
+        results.append(to_insert_results[-1])
+
+    inserted = await async_db.insert_raw_journeys(to_insert)
+
+    for result, was_inserted in zip(to_insert_results, inserted):
+        if was_inserted:
+            result.update({"status_code": 201, "message": "created"})
+        else:
+            # Inserted by something else since checking existing_uuids
+            result.update({"status_code": 409, "message": "already exists"})
+
+    for result in results:
+        metrics.count_ingest("push_journeys", result["status_code"])
+
+    return JSONResponse(status_code=200, content={"results": results})
+
+
 @app.get("/get_raw_journey")
 async def get_raw_journey(journey_uuid: str = None):
-    journey = db.raw_journeys.find_one({"uuid": journey_uuid})
+    journey = await async_db.raw_journeys.find_one({"uuid": journey_uuid})
     journey["_id"] = str(journey["_id"])
     return journey
 
 
 @app.get("/get_journey_uuids")
-async def get_raw_journey_uuids():
-    data = db.raw_journeys.find({}, {"uuid": 1, "_id": 0})
+async def get_raw_journey_uuids(
+    after: str = None, since: float = None, limit: int = Query(None, ge=1)
+):
+    """
+    Get the uuids of all journeys in the order they were inserted
+
+    :kwarg after: Continue on from the journey with this uuid, the last
+        uuid of a previous page
+    :kwarg since: Only journeys inserted at or after this timestamp, to only
+        get journeys newer than a previous sync
+    :kwarg limit: The max number of uuids to return
+    """
+    try:
+        uuids = await async_db.iter_raw_journey_uuids(
+            after=after, since=since, limit=limit
+        )
+    except LookupError as ex:
+        return JSONResponse(status_code=404, content={"message": str(ex)})
 
-    return list([i["uuid"] for i in data])
+    # A sync iterable so the cursor is read in a worker thread
+    return StreamingResponse(stream_json_list(uuids), media_type="application/json")
+
+
+# Requests waiting on the same generation share one poll of the job
+GEOJSON_GENERATIONS = SingleFlight()
+
+
+async def generate_geojson(job_params: dict) -> Optional[dict]:
+    """
+    Queue geojson generation and wait on it
+
+    :return: The finished job, or None if it's still running
+    """
+    job = await async_db.run(jobs.enqueue, "generate_geojson", job_params)
+    return await jobs.wait_for_job(job["_id"], GEOJSON_GENERATE_WAIT)
 
 
 # TODO: Update this endpoint name and support time ranges/coords
 @app.get("/get_geojson")
 async def get_all_journeys(
-    earliest_time: str = None, latest_time: str = None, place: str = None
+    earliest_time: str = None,
+    latest_time: str = None,
+    place: str = None,
+    bbox: str = None,
 ):
     """
     Fetch all the parsed journeys from the database between earliest/latest and
     return them as one GeoJSON FeatureCollection.
+
+    bbox as "west,south,east,north" limits the features to those intersecting it
     """
 
-    from via.geojson import generate, retrieve
+    from via.geojson import retrieve
+
+    if bbox is not None:
+        try:
+            bbox = retrieve.parse_bbox(bbox)
+        except ValueError as ex:
+            return JSONResponse(status_code=422, content={"message": str(ex)})
+
+    job_params = {
+        key: value
+        for key, value in {
+            "transport_type": "bike",
+            "earliest_time": earliest_time,
+            "latest_time": latest_time,
+            "place": place,
+        }.items()
+        if value is not None
+    }
 
-    data = None
     try:
-        data = retrieve.get_geojson(
-            "bike", earliest_time=earliest_time, latest_time=latest_time, place=place
+        data, save_time = await async_db.run(
+            retrieve.get_latest_geojson, "bike", place=place, bbox=bbox
         )
     except LookupError:
-        logger.info("geojson not found, generating")
-        try:
-            generate.generate_geojson(
-                "bike",
-                earliest_time=earliest_time,
-                latest_time=latest_time,
-                place=place,
+        logger.info("geojson not found, queueing generation")
+        job = await GEOJSON_GENERATIONS.do(
+            jobs.job_key("generate_geojson", job_params),
+            lambda: generate_geojson(job_params),
+        )
+
+        if job is None:
+            metrics.GEOJSON_REQUESTS.labels(result="generating").inc()
+            return JSONResponse(
+                status_code=202,
+                content={"message": "geojson is being generated, try again soon"},
             )
-        except Exception as ex:
-            logger.error("Could not generate geojson: %s", ex)
+        if job["status"] == jobs.JOB_FAILED:
+            logger.error("Could not generate geojson: %s", job["error"])
+            metrics.GEOJSON_REQUESTS.labels(result="failed").inc()
             return {
-                "message": f"Could not generate geojson: {ex}",
-                "traceback": traceback.format_exc(),
+                "message": f"Could not generate geojson: {job['error']}",
+                "traceback": job.get("traceback", None),
             }
-        else:
-            try:
-                data = retrieve.get_geojson(
-                    "bike",
-                    earliest_time=earliest_time,
-                    latest_time=latest_time,
-                    place=place,
-                )
-            except LookupError:
-                # Likely no data
-                return EMPTY_GEOJSON
-
-    return data
-
-
-def start_geojson_generate(first_run):
-    from via.geojson import generate
-
-    threading.Timer(60 * 60, start_geojson_generate, (False,)).start()
-    if not first_run:
-        # Don't do on startup
-        generate.generate_geojson(
-            "bike",
+
+        try:
+            data, save_time = await async_db.run(
+                retrieve.get_latest_geojson, "bike", place=place, bbox=bbox
+            )
+        except LookupError:
+            # Likely no data
+            metrics.GEOJSON_REQUESTS.labels(result="empty").inc()
+            return EMPTY_GEOJSON
+
+        metrics.GEOJSON_REQUESTS.labels(result="generated").inc()
+        stale = False
+    else:
+        # Serve what we have rather than making the client wait on generation
+        stale = datetime.datetime.utcnow().timestamp() - save_time > MAX_GEOJSON_AGE
+        metrics.GEOJSON_REQUESTS.labels(result="stale" if stale else "fresh").inc()
+        if stale:
+            logger.info("geojson is stale, queueing generation")
+            await async_db.run(jobs.enqueue, "generate_geojson", job_params)
+
+    return JSONResponse(
+        content=data,
+        headers={
+            "X-Geojson-Stale": "true" if stale else "false",
+            "X-Geojson-Generated": str(save_time),
+        },
+    )
+
+
+@app.get("/tiles/{z}/{x}/{y}")
+async def get_tile(z: int, x: int, y: int, place: str = None):
+    """
+    Fetch a Mapbox Vector Tile of edge quality, cut when the geojson was
+    last generated
+    """
+
+    from via.geojson import tiles
+
+    if not TILE_MIN_ZOOM <= z <= TILE_MAX_ZOOM:
+        return JSONResponse(
+            status_code=404,
+            content={
+                "message": f"zoom must be between {TILE_MIN_ZOOM} and {TILE_MAX_ZOOM}"
+            },
         )
+    if not (0 <= x < 2**z and 0 <= y < 2**z):
+        return JSONResponse(status_code=404, content={"message": "tile out of range"})
+
+    try:
+        tile = await async_db.run(tiles.get_tile, "bike", z, x, y, place=place)
+    except LookupError as ex:
+        return JSONResponse(status_code=404, content={"message": str(ex)})
 
+    if tile is None:
+        return Response(status_code=204)
 
-threading.Thread(target=start_geojson_generate, args=(True,)).start()
+    return Response(
+        content=tile,
+        media_type="application/vnd.mapbox-vector-tile",
+        headers={"Cache-Control": "public, max-age=3600"},
+    )
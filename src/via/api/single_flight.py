@@ -0,0 +1,28 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key so the work is only done once
+    and every caller gets its result
+    """
+
+    def __init__(self):
+        self.in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await func, or the call of it already in flight for the key
+
+        :param key:
+        :param func: coroutine function to call if nothing is in flight
+        """
+        future = self.in_flight.get(key, None)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+
+        # One caller going away shouldn't cancel the work for the rest
+        return await asyncio.shield(future)
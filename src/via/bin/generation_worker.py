@@ -0,0 +1,69 @@
+import argparse
+import time
+
+from prometheus_client import start_http_server
+
+from via import logger
+from via.caches.region_cache import get_geocoder
+from via.db import db
+from via.geojson.generate import generate_geojson
+from via.jobs import get_worker_id, process_next_job, schedule
+from via.settings import GEOJSON_GENERATE_INTERVAL, WORKER_METRICS_PORT
+
+
+JOB_HANDLERS = {"generate_geojson": generate_geojson}
+
+DEFAULT_GEOJSON_PARAMS = {"transport_type": "bike"}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--poll-interval",
+        dest="poll_interval",
+        type=float,
+        default=1,
+        help="Seconds to wait between checking for jobs when the queue is empty",
+    )
+    parser.add_argument(
+        "--once",
+        dest="once",
+        action="store_true",
+        help="Run queued jobs then exit rather than waiting for more",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        dest="metrics_port",
+        type=int,
+        default=WORKER_METRICS_PORT,
+        help="Port to serve prometheus metrics on, 0 to not serve them",
+    )
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+
+    db.ensure_indexes()
+
+    # Load before taking jobs so the first job doesn't wait on it
+    get_geocoder()
+
+    worker = get_worker_id()
+    logger.info("Generation worker %s started", worker)
+
+    while True:
+        schedule(
+            "generate_geojson",
+            "generate_geojson",
+            DEFAULT_GEOJSON_PARAMS,
+            interval=GEOJSON_GENERATE_INTERVAL,
+        )
+
+        if not process_next_job(worker, JOB_HANDLERS):
+            if args.once:
+                return
+            time.sleep(args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
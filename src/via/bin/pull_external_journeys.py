@@ -5,43 +5,87 @@ import requests
 
 from via import logger
 from via.db import db
-from via.models.journey import Journey
+from via.validation import validate_journey_data
 
 
 URLS = ["https://via-api.randombits.host"]
 
+PAGE_SIZE = 1000
 
-def main():
-    for base_url in URLS:
-        query_url = f"{base_url}/get_journey_uuids"
 
-        logger.info(f"Getting journeys from: {query_url}")
+def iter_remote_journey_uuid_pages(base_url: str, after: str = None):
+    """
+    Get pages of the uuids of journeys on another instance, oldest first
+
+    :param base_url:
+    :kwarg after: Only get journeys inserted after the journey with this uuid
+    """
+    query_url = f"{base_url}/get_journey_uuids"
+
+    while True:
+        params = {"limit": PAGE_SIZE}
+        if after is not None:
+            params["after"] = after
 
-        journeys_uuids = requests.get(query_url).json()
+        logger.info(f"Getting journeys from: {query_url} after {after}")
+        response = requests.get(query_url, params=params)
 
-        for journey_uuid in journeys_uuids:
-            result_count = db.raw_journeys.count_documents({"uuid": journey_uuid})
+        if response.status_code == 404 and after is not None:
+            # The journey we were continuing from no longer exists there
+            logger.warning(f"{after} not found on {base_url}, getting all journeys")
+            after = None
+            continue
 
-            if result_count == 0:
-                logger.info(f"Inserting: {journey_uuid}")
+        page = response.json()
+        if not page or page[-1] == after:
+            # page[-1] == after when an older instance ignores pagination
+            return
 
-                query_string = urlencode(OrderedDict(journey_uuid=journey_uuid))
-                url = f"{base_url}/get_raw_journey?{query_string}"
+        yield page
 
-                journey_data = requests.get(url).json()
+        if len(page) < PAGE_SIZE:
+            return
 
-                # Validate the journey
-                Journey(
-                    uuid=journey_data["uuid"],
-                    data=journey_data["data"],
-                    transport_type=journey_data["transport_type"],
-                    suspension=journey_data["suspension"],
-                    version=journey_data["version"],
-                )
+        after = page[-1]
 
-                db.raw_journeys.insert_one(journey_data)
-            else:
-                logger.debug(f"Already exists: {journey_uuid}")
+
+def main():
+    db.ensure_indexes()
+
+    for base_url in URLS:
+        sync_state = db.sync_state.find_one({"url": base_url}) or {}
+
+        for journeys_uuids in iter_remote_journey_uuid_pages(
+            base_url, after=sync_state.get("last_uuid", None)
+        ):
+            for journey_uuid in journeys_uuids:
+                result_count = db.raw_journeys.count_documents({"uuid": journey_uuid})
+
+                if result_count == 0:
+                    logger.info(f"Inserting: {journey_uuid}")
+
+                    query_string = urlencode(OrderedDict(journey_uuid=journey_uuid))
+                    url = f"{base_url}/get_raw_journey?{query_string}"
+
+                    journey_data = requests.get(url).json()
+                    journey_data.pop("_id", None)
+
+                    try:
+                        validate_journey_data(journey_data["data"])
+                    except ValueError as ex:
+                        logger.warning(f"Invalid journey {journey_uuid}: {ex}")
+                        continue
+
+                    if not db.insert_raw_journey(journey_data):
+                        logger.debug(f"Inserted elsewhere meanwhile: {journey_uuid}")
+                else:
+                    logger.debug(f"Already exists: {journey_uuid}")
+
+            db.sync_state.update_one(
+                {"url": base_url},
+                {"$set": {"last_uuid": journeys_uuids[-1]}},
+                upsert=True,
+            )
 
 
 if __name__ == "__main__":
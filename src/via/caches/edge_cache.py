@@ -1,7 +1,8 @@
+from via.caches.memo_cache import MemoCache
+from via.settings import EDGE_CACHE_SIZE
 from via.utils import get_combined_id
 
-
-EDGE_CACHE = {}
+EDGE_CACHE = MemoCache("edge", EDGE_CACHE_SIZE)
 
 
 def get_edge_data(origin_uuid: str, destination_uuid: str, graph=None):
@@ -20,5 +21,6 @@ def get_edge_data(origin_uuid: str, destination_uuid: str, graph=None):
     try:
         return EDGE_CACHE[combined_id]
     except KeyError:
-        EDGE_CACHE[combined_id] = graph.get_edge_data(origin_uuid, destination_uuid)
-        return EDGE_CACHE[combined_id]
+        edge_data = graph.get_edge_data(origin_uuid, destination_uuid)
+        EDGE_CACHE[combined_id] = edge_data
+        return edge_data
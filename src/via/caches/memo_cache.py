@@ -0,0 +1,70 @@
+import threading
+
+from cachetools import LRUCache
+
+from via.metrics import MEMO_CACHE_ENTRIES, MEMO_CACHE_EVENTS
+
+
+class MemoCache(LRUCache):
+    """
+    An LRU cache that counts hits, misses and evictions, both on the cache
+    and as prometheus metrics labelled with the cache name
+
+    Safe to share between threads
+    """
+
+    def __init__(self, name: str, maxsize: int):
+        super().__init__(maxsize)
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # LRUCache.popitem reads the evicted value through __getitem__,
+        # which shouldn't count as a hit
+        self._evicting = False
+
+        self._lock = threading.RLock()
+        self._hit_counter = MEMO_CACHE_EVENTS.labels(cache=name, event="hit")
+        self._miss_counter = MEMO_CACHE_EVENTS.labels(cache=name, event="miss")
+        self._eviction_counter = MEMO_CACHE_EVENTS.labels(cache=name, event="eviction")
+        self._entries_gauge = MEMO_CACHE_ENTRIES.labels(cache=name)
+
+    def __getitem__(self, key):
+        with self._lock:
+            if self._evicting:
+                return super().__getitem__(key)
+            try:
+                value = super().__getitem__(key)
+            except KeyError:
+                self.misses += 1
+                self._miss_counter.inc()
+                raise
+            self.hits += 1
+            self._hit_counter.inc()
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+            self._entries_gauge.set(len(self))
+
+    def __delitem__(self, key):
+        with self._lock:
+            super().__delitem__(key)
+
+    def popitem(self):
+        with self._lock:
+            self._evicting = True
+            try:
+                item = super().popitem()
+            finally:
+                self._evicting = False
+            self.evictions += 1
+            self._eviction_counter.inc()
+            return item
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self._entries_gauge.set(0)
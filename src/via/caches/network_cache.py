@@ -8,6 +8,7 @@ from gridfs import GridFS
 from networkx.classes.multidigraph import MultiDiGraph
 
 from via import logger
+from via.metrics import NETWORK_CACHE_LOOKUPS, timed
 from via.settings import GRIDFS_NETWORK_FILENAME_PREFIX, MAX_CACHE_SIZE
 from via.utils import is_within, get_graph_id, area_from_coords
 from via.caches.place_cache import place_cache
@@ -65,6 +66,7 @@ class NetworkCache:
             }
         )
 
+    @timed("network_cache_get")
     def get(self, journey) -> MultiDiGraph:
         """
 
@@ -97,6 +99,8 @@ class NetworkCache:
             )
             logger.debug("Getting network took: %s", time.monotonic() - start)
             network = self.get_from_mongo(candidates[0][0])
+            if network:
+                NETWORK_CACHE_LOOKUPS.labels(source="mongo").inc()
 
         if not network:
             # See if we can find a bbox smaller than the place cache bbox. If within bbox but less than 1/3rd the size, generate a personal one (or something)
@@ -121,6 +125,10 @@ class NetworkCache:
                     )
 
                     self.put_to_mongo(network, bbox)
+                    NETWORK_CACHE_LOOKUPS.labels(source="generated").inc()
+
+        if not network:
+            NETWORK_CACHE_LOOKUPS.labels(source="miss").inc()
 
         logger.debug(
             "Getting network %s took: %s",
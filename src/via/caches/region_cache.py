@@ -0,0 +1,169 @@
+import math
+import time
+from functools import cache
+from typing import Iterable, List, Optional, Tuple
+
+import reverse_geocoder as rg
+from pymongo.errors import BulkWriteError
+
+from via import logger
+from via.caches.memo_cache import MemoCache
+from via.db import db
+from via.settings import REGION_CACHE_SIZE, REGION_GRID_DEGREES
+
+
+@cache
+def get_geocoder() -> rg.RGeocoder:
+    """
+    Building the geocoder's KD tree takes seconds so it's only done once,
+    rg.search builds a new one every call
+    """
+    start = time.monotonic()
+    geocoder = rg.RGeocoder(mode=1, verbose=False)
+    logger.debug("Loading reverse geocoder took %s", time.monotonic() - start)
+    return geocoder
+
+
+def get_cell_id(lat: float, lng: float) -> str:
+    """
+    Id of the cell of the region grid the position is in. Includes the
+    grid size so cells of a different grid are never mixed up
+    """
+    return "%s_%d_%d" % (
+        REGION_GRID_DEGREES,
+        math.floor(lat / REGION_GRID_DEGREES),
+        math.floor(lng / REGION_GRID_DEGREES),
+    )
+
+
+def _cell_centre(cell_id: str) -> Tuple[float, float]:
+    _, lat_idx, lng_idx = cell_id.split("_")
+    return (
+        (int(lat_idx) + 0.5) * REGION_GRID_DEGREES,
+        (int(lng_idx) + 0.5) * REGION_GRID_DEGREES,
+    )
+
+
+def _format_location(location: dict) -> dict:
+    """
+    {'cc': 'IE', 'place_1': 'Rathgar', 'place_2': 'Leinster', 'place_3': 'Dublin City'}
+    """
+    data = dict(location)
+    data.pop("lat", None)
+    data.pop("lon", None)
+    data["place_1"] = data.pop("name", None)
+    data["place_2"] = data.pop("admin1", None)
+    data["place_3"] = data.pop("admin2", None)
+    return data
+
+
+class RegionCache:
+    """
+    Reverse geocoded places of cells of a lat / lng grid, in memory and
+    in mongo so they're kept across runs. Positions in the same cell get
+    the place of the centre of the cell
+    """
+
+    def __init__(self):
+        self.memo = MemoCache("region", REGION_CACHE_SIZE)
+
+    def _from_mongo(self, cell_ids: List[str]) -> dict:
+        found = {}
+        for doc in db.regions.find({"_id": {"$in": cell_ids}}):
+            found[doc.pop("_id")] = doc
+        return found
+
+    def _from_geocoder(self, cell_ids: List[str]) -> dict:
+        locations = get_geocoder().query(
+            [_cell_centre(cell_id) for cell_id in cell_ids]
+        )
+        found = {
+            cell_id: _format_location(location)
+            for cell_id, location in zip(cell_ids, locations)
+        }
+
+        try:
+            db.regions.insert_many(
+                [{"_id": cell_id, **place} for cell_id, place in found.items()],
+                ordered=False,
+            )
+        except BulkWriteError as ex:
+            # Another process geocoded some of the same cells
+            if any(error["code"] != 11000 for error in ex.details["writeErrors"]):
+                raise
+
+        return found
+
+    def get_many(self, points: Iterable[Tuple[float, float]]) -> List[dict]:
+        """
+        Get the places of many positions at once, with one lookup in mongo
+        and one query of the geocoder for any cells not already known.
+        The dicts are shared so shouldn't be modified
+
+        :param points: (lat, lng) of each position
+        :return: {cc, place_1, place_2, place_3} of each position
+        """
+        cell_ids = [get_cell_id(lat, lng) for lat, lng in points]
+
+        found = {}
+        missing = []
+        for cell_id in set(cell_ids):
+            try:
+                found[cell_id] = self.memo[cell_id]
+            except KeyError:
+                missing.append(cell_id)
+
+        if missing:
+            from_mongo = self._from_mongo(missing)
+            missing = [cell_id for cell_id in missing if cell_id not in from_mongo]
+            if missing:
+                from_mongo.update(self._from_geocoder(missing))
+
+            for cell_id, place in from_mongo.items():
+                self.memo[cell_id] = place
+            found.update(from_mongo)
+
+        return [found[cell_id] for cell_id in cell_ids]
+
+    def get(self, lat: float, lng: float) -> dict:
+        return self.get_many([(lat, lng)])[0]
+
+
+region_cache = RegionCache()
+
+
+def get_regions(journeys: Iterable) -> List[Optional[str]]:
+    """
+    Get the region of each journey, see Journey.region. The origins and
+    destinations of all the journeys are geocoded together
+
+    :return: place_2 of the origin of each journey, or of the destination if
+        the origin has none
+    """
+    journeys = list(journeys)
+
+    points = []
+    # (index of the journey, if the destination) of each of points
+    ends = []
+    for journey_idx, journey in enumerate(journeys):
+        columns = journey.columns
+        if len(columns) == 0:
+            continue
+        for is_destination, idx in enumerate([0, len(columns) - 1]):
+            lat, lng, _ = columns.get_position(idx)
+            if lat is None or lng is None:
+                continue
+            points.append((lat, lng))
+            ends.append((journey_idx, is_destination))
+
+    origins = [None] * len(journeys)
+    destinations = [None] * len(journeys)
+    for (journey_idx, is_destination), place in zip(
+        ends, region_cache.get_many(points)
+    ):
+        if is_destination:
+            destinations[journey_idx] = place["place_2"]
+        else:
+            origins[journey_idx] = place["place_2"]
+
+    return [origin or destination for origin, destination in zip(origins, destinations)]
@@ -26,5 +26,10 @@ USELESS_GEOJSON_PROPERTIES = {
 VALID_JOURNEY_MIN_DISTANCE = 250  # How far the journey must be
 VALID_JOURNEY_MIN_POINTS = 10  # How many gps points required in a journey
 VALID_JOURNEY_MIN_DURATION = 60  # Only if time is included
+VALID_JOURNEY_MAX_TIME_JITTER = 5  # Seconds time can go backwards by between points
+
+# n_seconds of the indirect distances of a journey worked out together, 0 is
+# every point. Serialized journeys include all but 0
+INDIRECT_DISTANCE_RESOLUTIONS = (0, 1, 5, 10, 30)
 
 EMPTY_GEOJSON = {"type": "FeatureCollection", "features": []}
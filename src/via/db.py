@@ -1,12 +1,20 @@
+import asyncio
 import os
+import time
+from typing import Iterator, List
 
 import pymongo
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from gridfs import GridFS
 from cached_property import cached_property
 
 from via.settings import (
     MONGO_RAW_JOURNEYS_COLLECTION,
     MONGO_NETWORKS_COLLECTION,
+    MONGO_SYNC_STATE_COLLECTION,
+    MONGO_JOBS_COLLECTION,
+    MONGO_REGIONS_COLLECTION,
 )
 
 
@@ -33,5 +41,250 @@ class DB:
     def networks(self):
         return getattr(self.client, MONGO_NETWORKS_COLLECTION)
 
+    @property
+    def sync_state(self):
+        return getattr(self.client, MONGO_SYNC_STATE_COLLECTION)
+
+    @property
+    def jobs(self):
+        return getattr(self.client, MONGO_JOBS_COLLECTION)
+
+    @property
+    def regions(self):
+        return getattr(self.client, MONGO_REGIONS_COLLECTION)
+
+    def ensure_indexes(self):
+        """
+        Create the indexes the app relies on. Safe to call on every startup
+        """
+        self._ensure_raw_journey_indexes()
+        self._backfill_inserted_at()
+        self.raw_journeys.create_index([("inserted_at", 1), ("uuid", 1)])
+
+        # Only one active job per config, finished jobs are kept for history
+        self.jobs.create_index(
+            "key", unique=True, partialFilterExpression={"active": True}
+        )
+        self.jobs.create_index([("active", 1), ("status", 1), ("run_after", 1)])
+
+    def _ensure_raw_journey_indexes(self):
+        """
+        Raw journeys from before uuids were unique may have duplicates which
+        would stop the unique index being built, so the newest of those
+        are removed first
+        """
+        for index in self.raw_journeys.index_information().values():
+            if index["key"] == [("uuid", 1)] and index.get("unique", False):
+                return
+
+        duplicates = self.raw_journeys.aggregate(
+            [
+                {"$sort": {"_id": 1}},
+                {
+                    "$group": {
+                        "_id": "$uuid",
+                        "ids": {"$push": "$_id"},
+                        "count": {"$sum": 1},
+                    }
+                },
+                {"$match": {"count": {"$gt": 1}}},
+            ],
+            allowDiskUse=True,
+        )
+        for duplicate in duplicates:
+            self.raw_journeys.delete_many({"_id": {"$in": duplicate["ids"][1:]}})
+
+        self.raw_journeys.create_index("uuid", unique=True)
+
+    def _backfill_inserted_at(self, batch_size: int = 1000):
+        """
+        Give raw journeys from before inserted_at was set the time of their
+        _id. Journeys pulled from other instances used to be inserted with
+        the _id of the other instance as a string, those get the time of
+        that, or 0 if it isn't an ObjectId string
+        """
+        missing = self.raw_journeys.find(
+            {"inserted_at": {"$exists": False}}, {"_id": 1}
+        )
+
+        updates = []
+        for raw_journey in missing:
+            _id = raw_journey["_id"]
+            if not isinstance(_id, ObjectId) and ObjectId.is_valid(_id):
+                _id = ObjectId(_id)
+            inserted_at = (
+                _id.generation_time.timestamp() if isinstance(_id, ObjectId) else 0
+            )
+            updates.append(
+                pymongo.UpdateOne(
+                    {"_id": raw_journey["_id"]}, {"$set": {"inserted_at": inserted_at}}
+                )
+            )
+            if len(updates) >= batch_size:
+                self.raw_journeys.bulk_write(updates, ordered=False)
+                updates = []
+
+        if updates:
+            self.raw_journeys.bulk_write(updates, ordered=False)
+
+    def insert_raw_journey(self, raw_journey: dict) -> bool:
+        """
+        Insert a raw journey if there isn't one with the same uuid already
+
+        :param raw_journey:
+        :return: If the journey was inserted
+        """
+        try:
+            result = self.raw_journeys.update_one(
+                {"uuid": raw_journey["uuid"]},
+                {"$setOnInsert": {**raw_journey, "inserted_at": time.time()}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Lost a race with another insert of the same uuid
+            return False
+
+        return result.upserted_id is not None
+
+    def insert_raw_journeys(self, raw_journeys: List[dict]) -> List[bool]:
+        """
+        Insert many raw journeys in one write, skipping any with a uuid that
+        already exists (including duplicates within raw_journeys)
+
+        :param raw_journeys:
+        :return: If each of the journeys was inserted
+        """
+        if not raw_journeys:
+            return []
+
+        inserted_at = time.time()
+        try:
+            result = self.raw_journeys.bulk_write(
+                [
+                    pymongo.UpdateOne(
+                        {"uuid": raw_journey["uuid"]},
+                        {"$setOnInsert": {**raw_journey, "inserted_at": inserted_at}},
+                        upsert=True,
+                    )
+                    for raw_journey in raw_journeys
+                ],
+                ordered=False,
+            )
+            upserted = set(result.upserted_ids.keys())
+        except BulkWriteError as ex:
+            if any(error["code"] != 11000 for error in ex.details["writeErrors"]):
+                raise
+            upserted = set(upsert["index"] for upsert in ex.details["upserted"])
+
+        return [idx in upserted for idx in range(len(raw_journeys))]
+
+    def iter_raw_journey_uuids(
+        self, after: str = None, since: float = None, limit: int = None
+    ) -> Iterator[str]:
+        """
+        Get the uuids of raw journeys in the order they were inserted.
+        Ordered by inserted_at then uuid rather than _id, as journeys
+        pulled from other instances may have string _ids
+
+        :kwarg after: Only get uuids inserted after the journey with this
+            uuid, to continue on from the last uuid of a previous call
+        :kwarg since: Only get uuids inserted at or after this timestamp
+        :kwarg limit: The max number of uuids to get
+        :raises LookupError: If there is no journey with the uuid after
+        """
+        query = {"inserted_at": {"$gte": since if since is not None else 0}}
+
+        if after is not None:
+            after_journey = self.raw_journeys.find_one(
+                {"uuid": after}, {"inserted_at": 1}
+            )
+            if after_journey is None:
+                raise LookupError(f"No journey with uuid: {after}")
+            after_inserted_at = after_journey.get("inserted_at", 0)
+            query = {
+                "$and": [
+                    query,
+                    {
+                        "$or": [
+                            {"inserted_at": {"$gt": after_inserted_at}},
+                            {"inserted_at": after_inserted_at, "uuid": {"$gt": after}},
+                        ]
+                    },
+                ]
+            }
+
+        cursor = self.raw_journeys.find(query, {"uuid": 1, "_id": 0}).sort(
+            [("inserted_at", 1), ("uuid", 1)]
+        )
+        if limit:
+            cursor = cursor.limit(limit)
+
+        return (raw_journey["uuid"] for raw_journey in cursor)
+
+
+class AsyncCollection:
+    """
+    Wraps a pymongo collection (or GridFS) so its methods run in a worker
+    thread rather than blocking the event loop.
+
+    find is read to the end in the worker thread so returns a list rather
+    than a cursor
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        async def run_method(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+        return run_method
+
+    async def find(self, *args, **kwargs) -> list:
+        return await asyncio.to_thread(
+            lambda: list(self.collection.find(*args, **kwargs))
+        )
+
+
+class AsyncDB:
+    """
+    Non-blocking access to a DB for use in async code (the api)
+    """
+
+    def __init__(self, sync_db: DB):
+        self.sync_db = sync_db
+
+    @property
+    def raw_journeys(self):
+        return AsyncCollection(self.sync_db.raw_journeys)
+
+    @property
+    def networks(self):
+        return AsyncCollection(self.sync_db.networks)
+
+    @property
+    def gridfs(self):
+        return AsyncCollection(self.sync_db.gridfs)
+
+    def __getattr__(self, name):
+        # Methods of DB, ensure_indexes / insert_raw_journey etc
+        method = getattr(self.sync_db, name)
+
+        async def run_method(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+        return run_method
+
+    @staticmethod
+    async def run(func, *args, **kwargs):
+        """
+        Run some function that uses the sync db (or is otherwise blocking)
+        in a worker thread
+        """
+        return await asyncio.to_thread(func, *args, **kwargs)
+
 
 db = DB()
+async_db = AsyncDB(db)
@@ -0,0 +1,116 @@
+from typing import Dict, Iterable
+
+import numpy
+
+
+# Same as the haversine package so distances match GPSPoint.distance_from
+EARTH_RADIUS_METRES = 6371008.8
+
+
+def haversine(lat_1, lng_1, lat_2, lng_2) -> numpy.ndarray:
+    """
+    Distance between each pair of points, as the crow flies
+
+    :param lat_1: lats of the first points, in degrees
+    :param lng_1: lngs of the first points, in degrees
+    :param lat_2: lats of the second points, in degrees
+    :param lng_2: lngs of the second points, in degrees
+    :return: distances in metres
+    """
+    lat_1, lng_1, lat_2, lng_2 = map(numpy.radians, (lat_1, lng_1, lat_2, lng_2))
+    d = (
+        numpy.sin((lat_2 - lat_1) * 0.5) ** 2
+        + numpy.cos(lat_1) * numpy.cos(lat_2) * numpy.sin((lng_2 - lng_1) * 0.5) ** 2
+    )
+    return EARTH_RADIUS_METRES * (2 * numpy.arcsin(numpy.sqrt(d)))
+
+
+def consecutive_distances(lat: numpy.ndarray, lng: numpy.ndarray) -> numpy.ndarray:
+    """
+    :return: Distance in metres from each point to the next, one fewer than
+        there are points
+    """
+    return haversine(lat[:-1], lng[:-1], lat[1:], lng[1:])
+
+
+def sample_every(time: numpy.ndarray, n_seconds: float) -> numpy.ndarray:
+    """
+    Get the points to use when only taking a location every n_seconds.
+    Points without a time are skipped. After the first point, each point
+    used is the next whose time is at least n_seconds after the last used
+
+    :param time: times of the points, nan if unknown
+    :return: indexes of the points to use
+    """
+    timed = numpy.flatnonzero(~numpy.isnan(time))
+    if len(timed) == 0:
+        return timed
+
+    times = time[timed]
+    if (numpy.diff(times) < 0).any():
+        # Not chronological, so can't binary search for the next point
+        used = [0]
+        for idx in range(1, len(times)):
+            if times[idx] >= times[used[-1]] + n_seconds:
+                used.append(idx)
+        return timed[used]
+
+    used = [0]
+    idx = 0
+    while True:
+        idx = int(numpy.searchsorted(times, times[idx] + n_seconds, side="left"))
+        idx = max(idx, used[-1] + 1)
+        if idx >= len(times):
+            return timed[used]
+        used.append(idx)
+
+
+def path_distance(
+    lat: numpy.ndarray, lng: numpy.ndarray, time: numpy.ndarray, n_seconds: float = 0
+) -> float:
+    """
+    Distance travelled along the points
+
+    :param n_seconds: only use a location every n_seconds, 0 to use every
+        point including those without a time
+    :return: distance in metres
+    """
+    if n_seconds != 0:
+        used = sample_every(time, n_seconds)
+        lat = lat[used]
+        lng = lng[used]
+
+    # Summed in order, like summing each distance one at a time would
+    return sum(consecutive_distances(lat, lng).tolist())
+
+
+def path_distances(
+    lat: numpy.ndarray,
+    lng: numpy.ndarray,
+    time: numpy.ndarray,
+    resolutions: Iterable[float],
+) -> Dict[float, float]:
+    """
+    Distance travelled along the points at several resolutions at once,
+    working out the distance between consecutive points only once
+
+    :param resolutions: n_seconds to get the distance for, see path_distance
+    :return: {n_seconds: distance in metres}
+    """
+    consecutive = consecutive_distances(lat, lng)
+    distances = {}
+    for n_seconds in resolutions:
+        if n_seconds == 0:
+            distances[n_seconds] = sum(consecutive.tolist())
+            continue
+
+        used = sample_every(time, n_seconds)
+        if len(used) == len(lat):
+            # Every point is used so the distances are the same as between
+            # consecutive points
+            distances[n_seconds] = sum(consecutive.tolist())
+        else:
+            distances[n_seconds] = sum(
+                consecutive_distances(lat[used], lng[used]).tolist()
+            )
+    return distances
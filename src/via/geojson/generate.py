@@ -1,22 +1,26 @@
 import operator
 import datetime
+import re
 import time
 
 import ujson
 
 from via import logger
+from via.metrics import timed
 from via.utils import (
     get_journeys,
     should_include_journey,
 )
 from via.settings import GEOJSON_FILENAME_PREFIX
 from via.models.journeys import Journeys
+from via.geojson.tiles import cut_tiles, store_tiles
 from via.db import db
 
 
 GENERATING = []
 
 
+@timed("generate_geojson")
 def generate_geojson(
     transport_type: str,
     version: str = False,
@@ -62,9 +66,11 @@ def generate_geojson(
             latest_time=latest_time,
         )
 
+        # Journeys with large bounding boxes are split into segments that
+        # are each matched to a small network
         journeys = Journeys(
             data=[
-                journey
+                segment
                 for journey in journeys
                 if should_include_journey(
                     journey,
@@ -73,6 +79,7 @@ def generate_geojson(
                     else None,
                     version=version,
                 )
+                for segment in journey.split()
             ]
         )
 
@@ -83,6 +90,7 @@ def generate_geojson(
 
             present = db.gridfs.find(
                 {
+                    "filename": re.compile(f"^{GEOJSON_FILENAME_PREFIX}"),
                     "metadata.journey_type": config["name"],
                     "metadata.geojson_version": config["version"],
                     "metadata.geojson_version_op": config["version_op"],
@@ -110,6 +118,11 @@ def generate_geojson(
                 filename=GEOJSON_FILENAME_PREFIX + "_" + ujson.dumps(meta),
             )
 
+            store_tiles(
+                cut_tiles(data),
+                {key: value for key, value in meta.items() if key != "save_time"},
+            )
+
     finally:
         GENERATING.remove(config)
 
@@ -1,43 +1,128 @@
 import datetime
 import re
+from typing import List, Tuple
 
 import ujson
+from cachetools.func import ttl_cache
+from shapely import STRtree
+from shapely.geometry import box, shape
 
-from via.settings import MAX_GEOJSON_AGE, GEOJSON_FILENAME_PREFIX
+from via.settings import MAX_CACHE_SIZE, MAX_GEOJSON_AGE, GEOJSON_FILENAME_PREFIX
 from via.db import db
+from via.metrics import timed
 
 
-def get_geojson(
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """
+    Parse a "west,south,east,north" bbox string
+
+    :raises ValueError: If the bbox is malformed
+    """
+    try:
+        west, south, east, north = [float(value) for value in bbox.split(",")]
+    except ValueError:
+        raise ValueError(f'bbox must be "west,south,east,north", got "{bbox}"')
+    if west > east or south > north:
+        raise ValueError(f"bbox is inverted: {bbox}")
+    return (west, south, east, north)
+
+
+@ttl_cache(maxsize=MAX_CACHE_SIZE, ttl=MAX_GEOJSON_AGE)
+def load_geojson(file_id) -> dict:
+    """
+    Load a stored geojson document. Artifacts are never modified after
+    being written so caching by id is safe
+    """
+    return ujson.loads(db.gridfs.get(file_id).read())
+
+
+@ttl_cache(maxsize=MAX_CACHE_SIZE, ttl=MAX_GEOJSON_AGE)
+def get_spatial_index(file_id) -> Tuple[STRtree, List[dict]]:
+    """
+    Build an STRtree over the features of a stored geojson document
+
+    :return: (tree, features) where tree indexes line up with features
+    """
+    features = [
+        feature
+        for feature in load_geojson(file_id).get("features", [])
+        if feature.get("geometry")
+    ]
+    return (STRtree([shape(feature["geometry"]) for feature in features]), features)
+
+
+@timed("retrieve_geojson")
+def get_latest_geojson(
     journey_type: str,
-    earliest_time: int = None,
-    latest_time: int = None,
     place: str = None,
-    version: str = None,
-    version_op: str = None,
-) -> dict:
-    # TODO: react to version/version_op/earliest_time/latest_time
+    bbox: Tuple[float, float, float, float] = None,
+    max_age: float = None,
+) -> Tuple[dict, float]:
+    """
+    Get the most recently generated geojson, however old it is unless max_age
+    is given
 
+    :kwarg bbox: (west, south, east, north) to only get features
+        intersecting it
+    :kwarg max_age: Seconds old the geojson can be
+    :return: (geojson, timestamp it was generated at)
+    :raises LookupError: If there's no geojson
+    """
     if journey_type is None:
         journey_type = "all"
 
-    filename_pattern = re.compile(f"^{GEOJSON_FILENAME_PREFIX}")
-
-    data = db.gridfs.find_one(
-        {
-            "filename": filename_pattern,
-            "metadata.journey_type": journey_type,
-            "metadata.save_time": {
-                "$gt": (
-                    datetime.datetime.utcnow()
-                    - datetime.timedelta(seconds=MAX_GEOJSON_AGE)
-                ).timestamp()
-            },
-            "metadata.place": place,
+    query = {
+        "filename": re.compile(f"^{GEOJSON_FILENAME_PREFIX}"),
+        "metadata.journey_type": journey_type,
+        "metadata.geojson_place": place,
+    }
+    if max_age is not None:
+        query["metadata.save_time"] = {
+            "$gt": (
+                datetime.datetime.utcnow() - datetime.timedelta(seconds=max_age)
+            ).timestamp()
         }
-    )
+
+    data = db.gridfs.find_one(query, sort=[("metadata.save_time", -1)])
     if data is None:
         raise LookupError()
 
-    data = ujson.loads(data.read())
+    save_time = data.metadata["save_time"]
+
+    if bbox is None:
+        return (load_geojson(data._id), save_time)
+
+    tree, features = get_spatial_index(data._id)
+    return (
+        {
+            "type": "FeatureCollection",
+            "features": [
+                features[idx]
+                for idx in sorted(tree.query(box(*bbox), predicate="intersects"))
+            ],
+        },
+        save_time,
+    )
+
+
+def get_geojson(
+    journey_type: str,
+    earliest_time: int = None,
+    latest_time: int = None,
+    place: str = None,
+    version: str = None,
+    version_op: str = None,
+    bbox: Tuple[float, float, float, float] = None,
+) -> dict:
+    """
+
+    :kwarg bbox: (west, south, east, north) to only get features
+        intersecting it
+    :raises LookupError: If there's no recent enough geojson
+    """
+    # TODO: react to version/version_op/earliest_time/latest_time
 
+    data, _ = get_latest_geojson(
+        journey_type, place=place, bbox=bbox, max_age=MAX_GEOJSON_AGE
+    )
     return data
@@ -0,0 +1,260 @@
+import datetime
+import math
+import pickle
+import re
+import threading
+from collections import defaultdict
+from typing import Mapping, Optional, Tuple
+
+import numpy
+import shapely
+import mapbox_vector_tile
+from cachetools.func import ttl_cache
+from shapely.geometry import box, shape
+
+from via import logger
+from via.db import db
+from via.metrics import timed
+from via.settings import (
+    MAX_CACHE_SIZE,
+    TILE_FILENAME_PREFIX,
+    TILE_MIN_ZOOM,
+    TILE_MAX_ZOOM,
+)
+
+WEB_MERCATOR_RADIUS = 6378137.0
+WEB_MERCATOR_ORIGIN = math.pi * WEB_MERCATOR_RADIUS
+WEB_MERCATOR_MAX_LAT = 85.0511287798
+
+TILE_EXTENT = 4096
+TILE_BUFFER = 64  # In tile units, so lines aren't drawn cut off at tile edges
+TILE_LAYER_NAME = "edge_quality"
+
+
+def _project(coords: numpy.ndarray) -> numpy.ndarray:
+    lng = numpy.radians(coords[:, 0])
+    lat = numpy.radians(
+        numpy.clip(coords[:, 1], -WEB_MERCATOR_MAX_LAT, WEB_MERCATOR_MAX_LAT)
+    )
+    return numpy.column_stack(
+        [
+            lng * WEB_MERCATOR_RADIUS,
+            numpy.log(numpy.tan(math.pi / 4 + lat / 2)) * WEB_MERCATOR_RADIUS,
+        ]
+    )
+
+
+def to_web_mercator(geometry):
+    """
+    Project a lng/lat shapely geometry to web mercator (EPSG:3857)
+    """
+    return shapely.transform(geometry, _project)
+
+
+def tile_size(zoom: int) -> float:
+    """
+    Width / height of a tile at a zoom in web mercator metres
+    """
+    return 2 * WEB_MERCATOR_ORIGIN / 2**zoom
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    :return: (min x, min y, max x, max y) of the tile in web mercator metres
+    """
+    size = tile_size(zoom)
+    min_x = -WEB_MERCATOR_ORIGIN + x * size
+    max_y = WEB_MERCATOR_ORIGIN - y * size
+    return (min_x, max_y - size, min_x + size, max_y)
+
+
+def lng_lat_to_tile(lng: float, lat: float, zoom: int) -> Tuple[int, int]:
+    """
+    :return: (x, y) of the tile containing the point at the zoom
+    """
+    [[merc_x, merc_y]] = _project(numpy.array([[lng, lat]]))
+    return _tile_index(merc_x, merc_y, zoom)
+
+
+def _tile_index(merc_x: float, merc_y: float, zoom: int) -> Tuple[int, int]:
+    size = tile_size(zoom)
+    last = 2**zoom - 1
+    return (
+        min(max(int((merc_x + WEB_MERCATOR_ORIGIN) // size), 0), last),
+        min(max(int((WEB_MERCATOR_ORIGIN - merc_y) // size), 0), last),
+    )
+
+
+def _tile_properties(properties: dict) -> dict:
+    # Vector tiles only take scalar values
+    cleaned = {}
+    for key, value in properties.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = ", ".join(str(item) for item in value)
+        elif not isinstance(value, (str, int, float, bool)):
+            value = str(value)
+        cleaned[key] = value
+    return cleaned
+
+
+@timed("cut_tiles")
+def cut_tiles(
+    geojson: dict, min_zoom: int = TILE_MIN_ZOOM, max_zoom: int = TILE_MAX_ZOOM
+) -> Mapping[Tuple[int, int, int], bytes]:
+    """
+    Cut a geojson FeatureCollection into Mapbox Vector Tiles. Only tiles
+    containing features are included
+
+    :param geojson:
+    :kwarg min_zoom:
+    :kwarg max_zoom:
+    :return: {(z, x, y): encoded tile}
+    """
+    features = [
+        (
+            to_web_mercator(shape(feature["geometry"])),
+            _tile_properties(feature.get("properties", {})),
+        )
+        for feature in geojson["features"]
+        if feature.get("geometry")
+    ]
+
+    tiles = {}
+    for zoom in range(min_zoom, max_zoom + 1):
+        buffer = tile_size(zoom) * TILE_BUFFER / TILE_EXTENT
+
+        tile_features = defaultdict(list)
+        for idx, (geometry, _) in enumerate(features):
+            min_x, min_y, max_x, max_y = geometry.bounds
+            west, north = _tile_index(min_x - buffer, max_y + buffer, zoom)
+            east, south = _tile_index(max_x + buffer, min_y - buffer, zoom)
+            for x in range(west, east + 1):
+                for y in range(north, south + 1):
+                    tile_features[(x, y)].append(idx)
+
+        for (x, y), feature_idxs in tile_features.items():
+            bounds = tile_bounds(zoom, x, y)
+            clip_box = box(
+                bounds[0] - buffer,
+                bounds[1] - buffer,
+                bounds[2] + buffer,
+                bounds[3] + buffer,
+            )
+
+            layer_features = []
+            for idx in feature_idxs:
+                geometry, properties = features[idx]
+                clipped = geometry.intersection(clip_box)
+                if not clipped.is_empty:
+                    layer_features.append(
+                        {"geometry": clipped, "properties": properties}
+                    )
+
+            if layer_features:
+                tiles[(zoom, x, y)] = mapbox_vector_tile.encode(
+                    [{"name": TILE_LAYER_NAME, "features": layer_features}],
+                    default_options={
+                        "quantize_bounds": bounds,
+                        "extents": TILE_EXTENT,
+                    },
+                )
+
+    return tiles
+
+
+def store_tiles(tiles: Mapping[Tuple[int, int, int], bytes], meta: dict):
+    """
+    Store tiles to gridfs, replacing any from a previous generation with the
+    same config
+
+    :param tiles: {(z, x, y): encoded tile} from cut_tiles
+    :param meta: metadata of the geojson the tiles were cut from
+    """
+    present = db.gridfs.find(
+        {
+            "filename": re.compile(f"^{TILE_FILENAME_PREFIX}"),
+            **{
+                f"metadata.{key}": value
+                for key, value in meta.items()
+                if key != "save_time"
+            },
+        }
+    )
+    for obj in list(present):
+        db.gridfs.delete(obj._id)
+
+    db.gridfs.put(
+        pickle.dumps(dict(tiles)),
+        metadata={
+            **meta,
+            "save_time": datetime.datetime.utcnow().timestamp(),
+            "min_zoom": min([z for z, _, _ in tiles], default=None),
+            "max_zoom": max([z for z, _, _ in tiles], default=None),
+        },
+        filename=f"{TILE_FILENAME_PREFIX}_{meta['journey_type']}",
+    )
+
+    logger.info("Stored %s tiles for %s", len(tiles), meta)
+
+
+@ttl_cache(maxsize=MAX_CACHE_SIZE, ttl=60)
+def get_tiles_id(journey_type: str, place: str = None):
+    """
+    Get the gridfs id of the most recently generated tiles
+
+    :raises LookupError: If no tiles have been generated
+    """
+    tiles_file = db.gridfs.find_one(
+        {
+            "filename": re.compile(f"^{TILE_FILENAME_PREFIX}"),
+            "metadata.journey_type": journey_type,
+            "metadata.geojson_place": place,
+        },
+        sort=[("metadata.save_time", -1)],
+    )
+    if tiles_file is None:
+        raise LookupError(f"No tiles for {journey_type}")
+    return tiles_file._id
+
+
+# {(journey_type, place): (gridfs id, tiles)}, only the latest tiles of each
+# so a previous generation isn't kept once there's a new one
+CURRENT_TILES = {}
+CURRENT_TILES_LOCK = threading.Lock()
+
+
+def get_tiles(
+    journey_type: str, place: str = None
+) -> Mapping[Tuple[int, int, int], bytes]:
+    """
+    Get the most recently generated tiles
+
+    :return: {(z, x, y): encoded tile}
+    :raises LookupError: If no tiles have been generated
+    """
+    tiles_id = get_tiles_id(journey_type, place=place)
+    key = (journey_type, place)
+
+    with CURRENT_TILES_LOCK:
+        current = CURRENT_TILES.get(key, None)
+        if current is None or current[0] != tiles_id:
+            # Dropped first so both aren't in memory at once
+            CURRENT_TILES.pop(key, None)
+            current = (tiles_id, pickle.loads(db.gridfs.get(tiles_id).read()))
+            CURRENT_TILES[key] = current
+
+    return current[1]
+
+
+def get_tile(
+    journey_type: str, z: int, x: int, y: int, place: str = None
+) -> Optional[bytes]:
+    """
+    Get an encoded Mapbox Vector Tile
+
+    :return: The tile, or None if there's no data in the tile
+    :raises LookupError: If no tiles have been generated
+    """
+    return get_tiles(journey_type, place=place).get((z, x, y), None)
@@ -0,0 +1,54 @@
+import hashlib
+import struct
+from typing import Iterable, Optional
+
+import numpy
+
+
+DIGEST_SIZE = 16
+
+
+def _as_float(value: Optional[float]) -> float:
+    return numpy.nan if value is None else value
+
+
+def hash_arrays(*arrays: numpy.ndarray) -> str:
+    """
+    Hash the bytes of arrays in one pass. Arrays of the same values give
+    the same hash wherever they came from
+
+    :return: hex digest
+    """
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for arr in arrays:
+        dtype = "<i8" if numpy.issubdtype(arr.dtype, numpy.integer) else "<f8"
+        arr = numpy.ascontiguousarray(arr, dtype=dtype)
+        # Include the length so values can't move between arrays
+        digest.update(struct.pack("<q", len(arr)))
+        digest.update(arr)
+    return digest.hexdigest()
+
+
+def hash_values(values: Iterable[Optional[float]]) -> int:
+    """
+    Hash some numbers, None is allowed
+
+    :return: 64 bit int
+    """
+    values = [_as_float(value) for value in values]
+    digest = hashlib.blake2b(
+        struct.pack(f"<{len(values)}d", *values), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "little")
+
+
+def hash_hashes(hashes: Iterable[str]) -> str:
+    """
+    Combine hex digests into one
+
+    :return: hex digest
+    """
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for value in hashes:
+        digest.update(bytes.fromhex(value))
+    return digest.hexdigest()
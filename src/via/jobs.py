@@ -0,0 +1,292 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Callable, Mapping, Optional
+
+import ujson
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from via import logger
+from via.db import db, async_db
+from via.metrics import JOBS
+from via.settings import JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS
+
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+JOB_RETRY_DELAY = 60  # Seconds, multiplied by the attempts so far
+
+
+def get_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def job_key(kind: str, params: dict) -> str:
+    """
+    Jobs with the same key do the same work so only one may be active
+    """
+    return ujson.dumps({"kind": kind, "params": params}, sort_keys=True)
+
+
+def enqueue(kind: str, params: dict = None, run_after: float = None) -> dict:
+    """
+    Add a job to the queue, unless the same job is already queued or running
+
+    :param kind: What handler to run the job with
+    :kwarg params: kwargs to give the handler
+    :kwarg run_after: Timestamp before which the job won't be claimed
+    :return: The active job with the same config, which may not be the one
+        just enqueued
+    """
+    params = params or {}
+    now = time.time()
+
+    def upsert():
+        return db.jobs.find_one_and_update(
+            {"key": job_key(kind, params), "active": True},
+            {
+                "$setOnInsert": {
+                    "kind": kind,
+                    "params": params,
+                    "status": JOB_PENDING,
+                    "attempts": 0,
+                    "created": now,
+                    "run_after": run_after or now,
+                }
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    try:
+        return upsert()
+    except DuplicateKeyError:
+        # Another process enqueued the same job at the same time, so the
+        # retry finds theirs
+        return upsert()
+
+
+def schedule(name: str, kind: str, params: dict = None, interval: int = 60 * 60):
+    """
+    Enqueue a job every interval seconds, however many processes call this.
+    Not due until an interval after the first call
+
+    :return: The job if one was enqueued
+    """
+    now = time.time()
+    try:
+        due = db.jobs.find_one_and_update(
+            {"_id": f"schedule_{name}", "next_run": {"$lte": now}},
+            {"$set": {"next_run": now + interval}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # The schedule exists but isn't due
+        return None
+
+    if due is None:
+        # Schedule was just created
+        return None
+
+    return enqueue(kind, params)
+
+
+def fail_expired(now: float = None) -> int:
+    """
+    Mark jobs as failed whose lease expired on their last attempt. A job
+    that kills its worker never gets to fail() so would otherwise be
+    reclaimed forever
+
+    :return: How many jobs were failed
+    """
+    now = now or time.time()
+    expired = {
+        "active": True,
+        "status": JOB_RUNNING,
+        "lease_expires": {"$lt": now},
+        "attempts": {"$gte": JOB_MAX_ATTEMPTS},
+    }
+
+    failed = 0
+    for job in db.jobs.find(expired, {"kind": 1}):
+        result = db.jobs.update_one(
+            {"_id": job["_id"], **expired},
+            {
+                "$set": {
+                    "status": JOB_FAILED,
+                    "active": False,
+                    "finished": now,
+                    "error": "Lease expired on the last attempt",
+                    "traceback": None,
+                }
+            },
+        )
+        if result.modified_count == 1:
+            logger.warning("Job %s failed, lease expired too often", job["_id"])
+            JOBS.labels(kind=job["kind"], result=JOB_FAILED).inc()
+            failed += 1
+
+    return failed
+
+
+def claim(worker: str) -> Optional[dict]:
+    """
+    Take the next job that's ready to run, or one whose lease has expired
+    and has attempts left
+
+    :param worker: id of the worker taking the job
+    """
+    now = time.time()
+    fail_expired(now)
+    return db.jobs.find_one_and_update(
+        {
+            "active": True,
+            "run_after": {"$lte": now},
+            "$or": [
+                {"status": JOB_PENDING},
+                {
+                    "status": JOB_RUNNING,
+                    "lease_expires": {"$lt": now},
+                    "attempts": {"$lt": JOB_MAX_ATTEMPTS},
+                },
+            ],
+        },
+        {
+            "$set": {
+                "status": JOB_RUNNING,
+                "worker": worker,
+                "started": now,
+                "lease_expires": now + JOB_LEASE_SECONDS,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("run_after", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _update_owned(job: dict, worker: str, update: dict) -> bool:
+    result = db.jobs.update_one(
+        {"_id": job["_id"], "worker": worker, "status": JOB_RUNNING}, update
+    )
+    return result.matched_count == 1
+
+
+def renew_lease(job: dict, worker: str) -> bool:
+    """
+    :return: If the worker still holds the job
+    """
+    return _update_owned(
+        job, worker, {"$set": {"lease_expires": time.time() + JOB_LEASE_SECONDS}}
+    )
+
+
+def complete(job: dict, worker: str) -> bool:
+    return _update_owned(
+        job,
+        worker,
+        {"$set": {"status": JOB_DONE, "active": False, "finished": time.time()}},
+    )
+
+
+def fail(job: dict, worker: str, error: str, trace: str = None) -> bool:
+    """
+    Put the job back on the queue to retry later, or mark it as failed if it
+    has been tried too many times
+    """
+    now = time.time()
+    if job["attempts"] >= JOB_MAX_ATTEMPTS:
+        update = {"status": JOB_FAILED, "active": False, "finished": now}
+    else:
+        update = {
+            "status": JOB_PENDING,
+            "run_after": now + JOB_RETRY_DELAY * job["attempts"],
+        }
+    update.update({"error": error, "traceback": trace})
+    return _update_owned(job, worker, {"$set": update})
+
+
+def get_job(job_id) -> Optional[dict]:
+    return db.jobs.find_one({"_id": job_id})
+
+
+async def wait_for_job(
+    job_id, timeout: float, poll_interval: float = 0.5
+) -> Optional[dict]:
+    """
+    Poll until the job has finished, whether it passed or failed
+
+    :return: The finished job, or None if it didn't finish within timeout
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        job = await async_db.run(get_job, job_id)
+        if job is not None and not job.get("active", False):
+            return job
+        if time.monotonic() >= deadline:
+            return None
+        await asyncio.sleep(poll_interval)
+
+
+@contextmanager
+def keep_lease(job: dict, worker: str):
+    """
+    Renew the lease on a job in the background for as long as it runs
+    """
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(JOB_LEASE_SECONDS / 3):
+            if not renew_lease(job, worker):
+                logger.warning("Lost lease on job %s", job["_id"])
+                return
+
+    thread = threading.Thread(target=renew, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def process_next_job(worker: str, handlers: Mapping[str, Callable]) -> bool:
+    """
+    Claim and run one job
+
+    :param worker: id of this worker
+    :param handlers: {kind: function to call with the job's params}
+    :return: If there was a job to run
+    """
+    job = claim(worker)
+    if job is None:
+        return False
+
+    logger.info("Running job %s: %s", job["_id"], job["key"])
+
+    handler = handlers.get(job["kind"], None)
+    if handler is None:
+        fail(job, worker, f"No handler for job kind: {job['kind']}")
+        JOBS.labels(kind=job["kind"], result=JOB_FAILED).inc()
+        return True
+
+    with keep_lease(job, worker):
+        try:
+            handler(**job["params"])
+        except Exception as ex:
+            logger.exception("Job %s failed", job["_id"])
+            fail(job, worker, str(ex), trace=traceback.format_exc())
+            JOBS.labels(kind=job["kind"], result=JOB_FAILED).inc()
+        else:
+            complete(job, worker)
+            JOBS.labels(kind=job["kind"], result=JOB_DONE).inc()
+
+    return True
@@ -0,0 +1,144 @@
+import functools
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Map matching a long journey can take minutes so go well past the defaults
+STAGE_BUCKETS = (
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+    300,
+    600,
+    1800,
+)
+
+STAGE_SECONDS = Histogram(
+    "via_stage_seconds",
+    "Time spent in a stage of the journey / geojson pipeline",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "via_stage_errors_total",
+    "Stages of the journey / geojson pipeline that raised",
+    ["stage"],
+)
+
+NETWORK_CACHE_LOOKUPS = Counter(
+    "via_network_cache_lookups_total",
+    "Network lookups for journeys by where the network came from",
+    ["source"],
+)
+
+INGESTED_JOURNEYS = Counter(
+    "via_ingested_journeys_total",
+    "Journeys pushed to the api by outcome",
+    ["endpoint", "result"],
+)
+
+GEOJSON_REQUESTS = Counter(
+    "via_geojson_requests_total",
+    "Geojson requests by what was served",
+    ["result"],
+)
+
+JOBS = Counter(
+    "via_jobs_total",
+    "Jobs run by the generation worker by outcome",
+    ["kind", "result"],
+)
+
+REQUEST_SECONDS = Histogram(
+    "via_request_seconds",
+    "Time to handle an api request",
+    ["method", "route", "status_code"],
+)
+
+MEMO_CACHE_EVENTS = Counter(
+    "via_memo_cache_events_total",
+    "Lookups and evictions of the in process memo caches",
+    ["cache", "event"],
+)
+MEMO_CACHE_ENTRIES = Gauge(
+    "via_memo_cache_entries",
+    "Entries in the in process memo caches",
+    ["cache"],
+    multiprocess_mode="liveall",
+)
+
+INGEST_RESULTS = {201: "created", 409: "duplicate", 422: "invalid"}
+
+
+@contextmanager
+def time_stage(stage: str):
+    """
+    Record how long the block takes and whether it raised
+    """
+    start = time.monotonic()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage=stage).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage=stage).observe(time.monotonic() - start)
+
+
+def timed(stage: str) -> Callable:
+    """
+    Decorator version of time_stage. Goes under @cached_property so only the
+    first, uncached, call is timed
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with time_stage(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count_ingest(endpoint: str, status_code: int):
+    INGESTED_JOURNEYS.labels(
+        endpoint=endpoint, result=INGEST_RESULTS.get(status_code, str(status_code))
+    ).inc()
+
+
+def render() -> Tuple[bytes, str]:
+    """
+    Get the metrics in the prometheus text format. If running with several
+    processes PROMETHEUS_MULTIPROC_DIR must be set so metrics from all of
+    them are included
+
+    :return: (body, content type)
+    """
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return (generate_latest(registry), CONTENT_TYPE_LATEST)
@@ -8,6 +8,8 @@ class Frame(GenericObject):
     and time info
     """
 
+    __slots__ = ("_uuid", "time", "gps", "acceleration")
+
     def __init__(self, time: float, gps: GPSPoint, acceleration: list):
         """
 
@@ -54,6 +54,10 @@ class GenericObjects:
 
 
 class GenericObject:
+    # Empty so subclasses can choose to use __slots__. Those that do need to
+    # include _uuid
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         """
 
@@ -1,11 +1,13 @@
 from typing import Tuple
 
-from cached_property import cached_property
-
-import reverse_geocoder as rg
 from haversine import haversine, Unit
 
-HAVERSINE_CACHE = {}
+from via.caches.memo_cache import MemoCache
+from via.caches.region_cache import region_cache
+from via.hashing import hash_values
+from via.settings import HAVERSINE_CACHE_SIZE
+
+HAVERSINE_CACHE = MemoCache("haversine", HAVERSINE_CACHE_SIZE)
 
 
 class GPSPoint:
@@ -16,14 +18,8 @@ class GPSPoint:
     sometimes libraries expect (lng, lat)
     """
 
-    def __del__(self):
-        attrs_to_del = ["reverse_geo", "content_hash"]
-
-        for attr in attrs_to_del:
-            try:
-                delattr(self, attr)
-            except AttributeError:
-                pass
+    # There can be millions of these so no __dict__ per instance
+    __slots__ = ("lat", "lng", "elevation", "_reverse_geo", "_content_hash")
 
     def __init__(self, lat: float, lng: float, elevation=None):
         """
@@ -36,6 +32,9 @@ class GPSPoint:
         self.lng = lng
         self.elevation = elevation
 
+        self._reverse_geo = None
+        self._content_hash = None
+
     def __eq__(self, oth):
         return self.lat == oth.lat and self.lng == oth.lng
 
@@ -65,39 +64,34 @@ class GPSPoint:
             point = point.point
 
         key = hash((self.point, point))
-        if key not in HAVERSINE_CACHE:
-            HAVERSINE_CACHE[key] = haversine(self.point, point, unit=Unit.METERS)
-
-        return HAVERSINE_CACHE[key]
+        try:
+            return HAVERSINE_CACHE[key]
+        except KeyError:
+            distance = haversine(self.point, point, unit=Unit.METERS)
+            HAVERSINE_CACHE[key] = distance
+            return distance
 
     def serialize(self) -> dict:
         return {"lat": self.lat, "lng": self.lng, "elevation": self.elevation}
 
-    @cached_property
+    @property
     def reverse_geo(self):
-        # TODO: make a cache for this for "close enough" positions if we end
-        # up using this frequently
-        data = dict(rg.search((self.lat, self.lng), mode=1)[0])
-        del data["lat"]
-        del data["lon"]
-        data["place_1"] = data.pop("name", None)
-        data["place_2"] = data.pop("admin1", None)
-        data["place_3"] = data.pop("admin2", None)
-        return data
-
-    @cached_property
+        """
+        The place of the point, the same for "close enough" positions. See
+        RegionCache
+        """
+        if self._reverse_geo is None:
+            self._reverse_geo = dict(region_cache.get(self.lat, self.lng))
+        return self._reverse_geo
+
+    @property
     def content_hash(self) -> int:
         """
         A content hash that will act as an id for the data, handy for caching
         """
-        input_string = f"{self.lat} {self.lng} {self.elevation}"
-        encoded_int = 0
-
-        for char in input_string:
-            encoded_int = (encoded_int << 8) + ord(char)
-            encoded_int %= 1000000000
-
-        return encoded_int
+        if self._content_hash is None:
+            self._content_hash = hash_values([self.lat, self.lng, self.elevation])
+        return self._content_hash
 
     @property
     def point(self) -> Tuple[float, float]:
@@ -1,9 +1,11 @@
 import datetime
+import math
 import time
 import statistics
 from pathlib import Path
 from functools import cache
 from collections import defaultdict
+from typing import List, Mapping, Optional
 from packaging import version
 
 from dateutil.parser import parse
@@ -22,21 +24,33 @@ from mappymatch.maps.nx.nx_map import NxMap
 from mappymatch.matchers.lcss.lcss import LCSSMatcher
 from mappymatch.utils.plot import plot_matches
 
+import numpy
 import pandas
 
 from via import settings
 from via import logger
+from via.metrics import timed
+from via.distance import (
+    consecutive_distances,
+    haversine,
+    path_distance,
+    path_distances,
+)
 from via.utils import window, get_combined_id, get_graph_id
 from via.constants import (
+    METRES_PER_DEGREE,
     VALID_JOURNEY_MIN_DISTANCE,
     VALID_JOURNEY_MIN_POINTS,
     VALID_JOURNEY_MIN_DURATION,
+    INDIRECT_DISTANCE_RESOLUTIONS,
 )
 from via.geojson.utils import geojson_from_graph
 from via.models.point import FramePoint, FramePoints
+from via.models.point_columns import PointColumns, SLOW_UNKNOWN
 from via.models.frame import Frame
 from via.caches.edge_cache import get_edge_data
 from via.caches.network_cache import network_cache
+from via.caches.region_cache import get_regions
 from via.models.journey_mixins import (
     SnappedRouteGraphMixin,
     BoundingGraphMixin,
@@ -61,6 +75,57 @@ def get_matcher_by_graph(bounding_graph):
     )
 
 
+def _raw_frames_to_arrays(data) -> Optional[Mapping[str, numpy.ndarray]]:
+    """
+    Get raw frames as arrays, with None as nan
+
+    :return: {"time": arr, "acc": arr, "lat": arr, "lng": arr, "elevation": arr}
+        or None if data isn't all raw frames
+    """
+    times = []
+    accs = []
+    lats = []
+    lngs = []
+    elevations = []
+    for frame in data:
+        if not isinstance(frame, dict) or isinstance(frame["acc"], list):
+            return None
+        gps = frame["gps"]
+        if isinstance(gps, dict):
+            lats.append(gps["lat"])
+            lngs.append(gps["lng"])
+            elevations.append(gps.get("elevation", None))
+        elif isinstance(gps, list):
+            lats.append(gps[0])
+            lngs.append(gps[1])
+            elevations.append(None)
+        else:
+            return None
+        times.append(frame.get("time", None))
+        accs.append(frame["acc"])
+
+    try:
+        return {
+            "time": numpy.array(times, dtype=float),
+            "acc": numpy.array(accs, dtype=float),
+            "lat": numpy.array(lats, dtype=float),
+            "lng": numpy.array(lngs, dtype=float),
+            "elevation": numpy.array(elevations, dtype=float),
+        }
+    except (TypeError, ValueError):
+        return None
+
+
+def _running_areas(lat: numpy.ndarray, lng: numpy.ndarray) -> numpy.ndarray:
+    """
+    :return: Area in m^2 of the bounding box of the points up to and
+        including each point, as area_from_coords would give
+    """
+    vert = numpy.fmax.accumulate(lat) - numpy.fmin.accumulate(lat)
+    hori = numpy.fmax.accumulate(lng) - numpy.fmin.accumulate(lng)
+    return (vert * METRES_PER_DEGREE) * (hori * METRES_PER_DEGREE)
+
+
 class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
     """
     A single journey (or patial journey)
@@ -82,6 +147,11 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
         """
         self.gps_inclusion_iter = 0
         self.bad_speed = False
+        self._path_metrics_key = None
+        self._path_metrics = None
+        # Indexes of the pairs of consecutive points used for edges if this
+        # is a segment of a split journey, None to use all
+        self._owned_pairs = None
 
         data = []
         if "data" in kwargs:
@@ -121,35 +191,216 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
             return objs
 
         if isinstance(objs, dict):
-            return Journey(**objs)
+            return Journey.from_raw(**objs)
 
         raise NotImplementedError(f"Can't parse journey from type {type(objs)}")
 
-    def set_contexts(self):
+    @staticmethod
+    def from_raw(data=None, **kwargs):
         """
-        For each of the FramePoints in the journey give each of them
-        context of their surrounding points
+        Make a journey from raw frames, as stored in mongo, all at once
+        rather than appending each frame. Gives the same points as
+        Journey(data=data, **kwargs)
+
+        :kwarg data: list of {"time": float, "gps": [lat, lng], "acc": float}
+            or {"time": arr, "acc": arr, "lat": arr, "lng": arr} as from
+            raw_data_to_arrays, or the data of serialize(compact=True)
+        :kwarg: Anything else Journey takes
         """
+        if data is None:
+            data = []
+
+        if isinstance(data, Mapping) and "acc_offsets" in data:
+            journey = Journey(**kwargs)
+            journey.load_compact(data)
+            return journey
 
-        if len(self._data) < 7:
+        arrays = data if isinstance(data, Mapping) else _raw_frames_to_arrays(data)
+        if arrays is None:
+            # Not raw frames, serialized FramePoints or such
+            return Journey(data=data, **kwargs)
+
+        journey = Journey(**kwargs)
+        journey._extend_raw(**arrays)
+        return journey
+
+    def _extend_raw(
+        self,
+        time: numpy.ndarray,
+        acc: numpy.ndarray,
+        lat: numpy.ndarray,
+        lng: numpy.ndarray,
+        elevation: numpy.ndarray = None,
+    ):
+        """
+        Does what appending each frame would to an empty journey, over
+        arrays of the frames. See append for what that is
+        """
+        if len(self.columns) != 0:
+            raise ValueError("Can only add raw frames to an empty journey")
+
+        if elevation is None:
+            elevation = numpy.full(len(time), numpy.nan)
+
+        # Only every GPS_INCLUDE_RATIO populated gps is used, frames take the
+        # last gps used. Frames before any gps are dropped
+        populated = numpy.isfinite(lat) & numpy.isfinite(lng) & (lat != 0) & (lng != 0)
+        populated_idx = numpy.flatnonzero(populated)
+        used_idx = populated_idx[
+            numpy.arange(len(populated_idx)) % settings.GPS_INCLUDE_RATIO == 0
+        ]
+        gps_source = numpy.full(len(time), -1)
+        gps_source[used_idx] = used_idx
+        gps_source = numpy.maximum.accumulate(gps_source) if len(time) else gps_source
+
+        kept = gps_source >= 0
+        gps_source = gps_source[kept]
+        time = time[kept]
+        acc = acc[kept]
+        lat = lat[gps_source]
+        lng = lng[gps_source]
+        elevation = elevation[gps_source]
+
+        self.gps_inclusion_iter = len(populated_idx)
+        if len(time) == 0:
             return
 
-        # set context for idx 1 and -2 as 3 (as 0 and -1 will be skipped for context setting)
-        self._data[1].set_context(pre=[self._data[0]], post=[self._data[2]])
-        self._data[-2].set_context(pre=[self._data[-3]], post=[self._data[-1]])
+        # Frames at the same gps as the last point are merged into it, so
+        # each run of the same gps is a point
+        starts_run = numpy.ones(len(time), dtype=bool)
+        starts_run[1:] = (lat[1:] != lat[:-1]) | (lng[1:] != lng[:-1])
+        run_starts = numpy.flatnonzero(starts_run)
+        run_ids = numpy.cumsum(starts_run) - 1
+
+        # Speed from the last point is only checked where the gps changes.
+        # Where it can't be worked out the last bad_speed carries over
+        time_diff = time[run_starts[1:]] - time[run_starts[:-1]]
+        distance = haversine(
+            lat[run_starts[:-1]],
+            lng[run_starts[:-1]],
+            lat[run_starts[1:]],
+            lng[run_starts[1:]],
+        )
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            metres_per_second = numpy.where(time_diff == 0, 0, distance / time_diff)
+        checked = ~numpy.isnan(time_diff) & (distance != 0)
+        is_bad = (metres_per_second < settings.MIN_METRES_PER_SECOND) | (
+            metres_per_second > settings.MAX_METRES_PER_SECOND
+        )
+
+        last_checked = numpy.where(
+            numpy.concatenate([[True], checked]), numpy.arange(len(run_starts)), 0
+        )
+        last_checked = numpy.maximum.accumulate(last_checked)
+        bad_run = numpy.concatenate([[self.bad_speed], is_bad])[last_checked]
+
+        # Bad speed points are kept as slow without accelerations, and the
+        # rest of their run is dropped. None accelerations count as 0 when
+        # starting a point but are skipped when merging
+        acc = numpy.where(starts_run & numpy.isnan(acc), 0, acc)
+        acc[run_starts[bad_run]] = 0
+        with numpy.errstate(invalid="ignore"):
+            acc_kept = (acc >= settings.MIN_ACC_SCORE) & (
+                starts_run | ~bad_run[run_ids]
+            )
 
-        # set context for 2 and -3 as 5 (as 1 and -2 will be skipped for context setting)
-        self._data[2].set_context(
-            pre=[self._data[0], self._data[1]], post=[self._data[3], self._data[4]]
+        acc_offsets = numpy.zeros(len(run_starts) + 1, dtype=numpy.int64)
+        acc_offsets[1:] = numpy.cumsum(
+            numpy.bincount(run_ids[acc_kept], minlength=len(run_starts))
         )
-        self._data[-3].set_context(
-            pre=[self._data[-5], self._data[-4]], post=[self._data[-2], self._data[-1]]
+
+        self._data = []
+        self._columns = PointColumns.from_arrays(
+            time[run_starts],
+            lat[run_starts],
+            lng[run_starts],
+            elevation[run_starts],
+            numpy.where(bad_run, 1, SLOW_UNKNOWN),
+            acc[acc_kept],
+            acc_offsets,
         )
+        self.bad_speed = bool(bad_run[-1])
+
+        self.set_contexts()
+
+    def split(self, max_area: float = None) -> List["Journey"]:
+        """
+        Split into segments of which the bounding boxes are no larger than
+        max_area, so each segment can be matched with a small bounding
+        graph. Segments overlap by the context width so points at the seams
+        keep the same context, but each pair of consecutive points only
+        gives edge data in one segment
+
+        :kwarg max_area: in m^2, defaults to settings.MAX_JOURNEY_METRES_SQUARED
+        :return: [self] if already no larger than max_area
+        """
+        if max_area is None:
+            max_area = settings.MAX_JOURNEY_METRES_SQUARED
+
+        size = len(self.columns)
+        if size < 2 or self.area <= max_area:
+            return [self]
+
+        # At least one point past the last pair of a segment so it has both
+        # ends of that pair
+        margin = max(self.context_width, 1)
+        lat = self.columns.lat
+        lng = self.columns.lng
+
+        segments = []
+        start = 0
+        while start < size - 1:
+            lo = max(start - margin, 0)
+            over = numpy.flatnonzero(_running_areas(lat[lo:], lng[lo:]) > max_area)
+            if len(over) == 0:
+                stop = size - 1
+            else:
+                # A single pair larger than max_area still makes a segment
+                stop = max(lo + int(over[0]) - margin - 1, start + 1)
+            # Up to and including the point margin past stop, the destination
+            # of the last owned pair
+            hi = min(stop + margin + 1, size)
 
-        # then do normal loop which will skip the ones already set because they'll be on the edge
-        for one, two, three, four, five, six, seven in window(self, window_size=7):
-            if not four.is_context_populated:
-                four.set_context(pre=[one, two, three], post=[five, six, seven])
+            segments.append(self._segment(lo, hi, range(start, stop)))
+            start = stop
+
+        return segments
+
+    def _segment(self, lo: int, hi: int, owned_pairs: range) -> "Journey":
+        """
+        Get the points from lo up to hi as a journey of their own
+
+        :param owned_pairs: indexes of the pairs of points the segment
+            gives edge data for
+        """
+        segment = Journey(
+            transport_type=self.transport_type,
+            suspension=self.suspension,
+            version=self._version,
+            network_type=self.network_type,
+            timestamp=self._timestamp,
+            context_width=self.context_width,
+        )
+        segment._columns = self.columns.slice(lo, hi)
+        segment.bad_speed = self.bad_speed
+        segment._owned_pairs = range(owned_pairs.start - lo, owned_pairs.stop - lo)
+        if self._context_size is not None and self._context_size > lo:
+            segment._context_size = min(self._context_size, hi) - lo
+        return segment
+
+    def set_contexts(self):
+        """
+        For each of the FramePoints in the journey give each of them
+        context of their surrounding points
+        """
+
+        if len(self.columns) < 2 * self.context_width + 1:
+            return
+
+        # Contexts are index ranges worked out from this when asked for, so
+        # nothing per point. Points appended after this get context the next
+        # time contexts are set
+        self._context_size = len(self.columns)
 
     def extend(self, objs):
         # Possibly shouldn't set contexts here and should be done explicitly
@@ -168,7 +419,7 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
         """
         # TODO: warn if not chronological
         if isinstance(obj, FramePoint):
-            self._data.append(obj)
+            self._append_point(obj)
         elif isinstance(obj, (dict, Frame)):
             # Most datapoints are only accelerometer so we need to find the
             # closest point with gps in the past to add the accelerometer
@@ -191,16 +442,30 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
                     return
                 frame.gps = self.last_gps
 
-            if len(self._data) == 0:
-                self._data.append(FramePoint(frame.time, frame.gps, frame.acceleration))
+            if len(self.columns) == 0:
+                self._append_values(frame.time, frame.gps, frame.acceleration)
                 return
 
+            # Read from the columns rather than making a FramePoint of the
+            # last point for every frame
+            last_idx = len(self.columns) - 1
+            last_gps = self._gps_at(last_idx)
+
             # Annotate points that are too slow / fast in relation to
             # the previous point
             if (
                 frame_gps_populated or frame.gps.is_populated
             ) and frame.time is not None:
-                metres_per_second = self._data[-1].speed_between(frame)
+                # Same as FramePoint.speed_between
+                metres_per_second = None
+                distance = last_gps.distance_from(frame.gps)
+                if distance != 0:
+                    time_diff = frame.time - self._time_at(last_idx)
+                    if time_diff == 0:
+                        metres_per_second = 0
+                    else:
+                        metres_per_second = distance / time_diff
+
                 if metres_per_second is not None:
                     if any(
                         [
@@ -213,20 +478,49 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
                         self.bad_speed = False
 
             if self.bad_speed:
-                if self._data[-1].gps != frame.gps:
-                    self._data.append(
-                        FramePoint(frame.time, frame.gps, None, slow=True)
-                    )
+                if last_gps != frame.gps:
+                    self._append_values(frame.time, frame.gps, None, slow=True)
             else:
-                if self._data[-1].gps == frame.gps:
-                    self._data[-1].append_acceleration(frame.acceleration)
+                if last_gps == frame.gps:
+                    self._append_acceleration(last_idx, frame.acceleration)
                 else:
-                    self._data.append(
-                        FramePoint(frame.time, frame.gps, frame.acceleration)
-                    )
+                    self._append_values(frame.time, frame.gps, frame.acceleration)
         else:
             raise NotImplementedError("Cannot append to journey of type: {type(obj)}")
 
+    def _get_path_metrics(self) -> dict:
+        """
+        Work out the distances at each of INDIRECT_DISTANCE_RESOLUTIONS,
+        the duration and whether there's enough data in one go, kept until
+        points are added. Serializing and filtering then scan the points
+        once rather than once per distance
+        """
+        columns = self.columns
+        # The columns themselves are in the key as they're replaced if the
+        # points are
+        key = (columns, len(columns))
+        if self._path_metrics_key == key:
+            return self._path_metrics
+
+        distances = path_distances(
+            columns.lat, columns.lng, columns.time, INDIRECT_DISTANCE_RESOLUTIONS
+        )
+        duration = self.duration if len(columns) else None
+        self._path_metrics_key = key
+        self._path_metrics = {
+            "indirect_distance": distances,
+            "duration": duration,
+            "has_enough_data": all(
+                [
+                    distances[0] >= VALID_JOURNEY_MIN_DISTANCE,
+                    len(columns) >= VALID_JOURNEY_MIN_POINTS,
+                    # No duration if either end has no time
+                    duration is None or duration >= VALID_JOURNEY_MIN_DURATION,
+                ]
+            ),
+        }
+        return self._path_metrics
+
     def get_indirect_distance(self, n_seconds: int = 0) -> float:
         """
         NB: Data must be chronological
@@ -237,19 +531,15 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
         :rtype: float
         :return: distance travelled in metres
         """
-        previous_used_frame = None
-        distances = []
-
-        for frame in self:
-            if frame.time is None and n_seconds != 0:
-                continue
-            if previous_used_frame is None:
-                previous_used_frame = frame
-            elif n_seconds == 0 or frame.time >= previous_used_frame.time + n_seconds:
-                distances.append(previous_used_frame.distance_from(frame))
-                previous_used_frame = frame
-
-        return sum(distances)
+        distances = self._get_path_metrics()["indirect_distance"]
+        if n_seconds not in distances:
+            distances[n_seconds] = path_distance(
+                self.columns.lat,
+                self.columns.lng,
+                self.columns.time,
+                n_seconds=n_seconds,
+            )
+        return distances[n_seconds]
 
     def get_avg_speed(self, n_seconds: int = 30) -> float:
         """
@@ -272,29 +562,44 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
         minimal: bool = False,
         include_time: bool = True,
         include_context: bool = True,
+        compact: bool = False,
     ):
+        """
+
+        :kwarg minimal: Leave out distances, duration and such
+        :kwarg include_time: Include the time of each point
+        :kwarg include_context: Include the context of each point, not
+            used if compact as the context is always kept
+        :kwarg compact: Serialize the points as columns with the context
+            as its width, see FramePoints.serialize_compact
+        """
+        if compact:
+            points = self.serialize_compact(include_time=include_time)
+        else:
+            points = super().serialize(
+                include_time=include_time, include_context=include_context
+            )
+
         data = {
             "uuid": str(self.uuid),
             "version": str(self.version),
-            "data": super().serialize(
-                include_time=include_time, include_context=include_context
-            ),
+            "data": points,
             "transport_type": self.transport_type,
             "suspension": self.suspension,
         }
 
         if minimal is False:
+            metrics = self._get_path_metrics()
+            distances = metrics["indirect_distance"]
+            duration = metrics["duration"]
             data.update(
                 {
                     "direct_distance": self.direct_distance,
                     "indirect_distance": {
-                        1: self.get_indirect_distance(n_seconds=1),
-                        5: self.get_indirect_distance(n_seconds=5),
-                        10: self.get_indirect_distance(n_seconds=10),
-                        30: self.get_indirect_distance(n_seconds=30),
+                        n_seconds: distances[n_seconds] for n_seconds in [1, 5, 10, 30]
                     },
                     "data_quality": self.data_quality,
-                    "duration": self.duration,
+                    "duration": duration,
                     "avg_speed": self.get_avg_speed(),
                 }
             )
@@ -310,6 +615,7 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
         return parse(self._timestamp)
 
     @cached_property
+    @timed("edge_quality_map")
     def edge_quality_map(self):
         """
         Get a map between edge_hash and road quality of the road. edge_map
@@ -352,6 +658,7 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
         return data
 
     @cached_property
+    @timed("edge_data")
     def edge_data(self):
         """
         Get all the edges with their associated data for this journey.
@@ -374,9 +681,13 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
 
         data = defaultdict(list)
 
-        for (our_origin, our_destination), match_point in zip(
-            window(self, window_size=2), match_result.matches
+        for idx, ((our_origin, our_destination), match_point) in enumerate(
+            zip(window(self, window_size=2), match_result.matches)
         ):
+            if self._owned_pairs is not None and idx not in self._owned_pairs:
+                # Another segment of the journey uses this pair
+                continue
+
             if not match_point or not match_point.road:
                 continue
 
@@ -417,6 +728,7 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
         logger.debug("Saved mappymatch path to: %s", filepath)
 
     @cached_property
+    @timed("route_graph")
     def route_graph(self):
         """
         Get a graph of the journey without snapping to closest node / edge
@@ -427,7 +739,11 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
 
         combined_edge_data = defaultdict(list)
 
-        for origin, destination in window(self, window_size=2):
+        distances = consecutive_distances(self.columns.lat, self.columns.lng).tolist()
+        speeds = self.speeds.tolist()
+        road_qualities = self.road_qualities.tolist()
+
+        for idx, (origin, destination) in enumerate(window(self, window_size=2)):
             edge_id = get_combined_id(origin.uuid, destination.uuid)
 
             graph.add_node(origin.uuid, **{"x": origin.gps.lng, "y": origin.gps.lat})
@@ -435,7 +751,9 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
                 destination.uuid, **{"x": destination.gps.lng, "y": destination.gps.lat}
             )
 
-            distance = origin.distance_from(destination)
+            distance = distances[idx]
+            origin_speed = speeds[idx]
+            destination_speed = speeds[idx + 1]
 
             # NOTE: Maybe road_quality to None if speed is too slow?
             combined_edge_data[edge_id].append(
@@ -443,9 +761,9 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
                     "origin": origin,
                     "destination": destination,
                     "distance": distance,
-                    "road_quality": origin.road_quality,
-                    "speed": (origin.speed + destination.speed) / 2
-                    if (origin.speed is not None and destination.speed is not None)
+                    "road_quality": road_qualities[idx],
+                    "speed": (origin_speed + destination_speed) / 2
+                    if not (math.isnan(origin_speed) or math.isnan(destination_speed))
                     else None
                     # TODO: other bits, speed / elevation maybe?
                 }
@@ -531,16 +849,7 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
         """
         Return if the journey has enough data to be included in the final stats
         """
-        return all(
-            [
-                self.get_indirect_distance(n_seconds=0) >= VALID_JOURNEY_MIN_DISTANCE,
-                len(self._data) >= VALID_JOURNEY_MIN_POINTS,
-                self.duration >= VALID_JOURNEY_MIN_DURATION
-                or (self.destination.time is None and self.origin.time is None)
-                if self.duration is not None
-                else True,
-            ]
-        )
+        return self._get_path_metrics()["has_enough_data"]
 
     @property
     def geojson(self):
@@ -571,10 +880,6 @@ class Journey(FramePoints, SnappedRouteGraphMixin, BoundingGraphMixin):
         # This is also a possible issue with place_2 but will happen
         # much less, still a FIXME
         # {'cc': 'IE', 'place_1': 'Rathgar', 'place_2': 'Leinster', 'place_3': 'Dublin City'}
-        region_name = self.origin.gps.reverse_geo["place_2"]
-        if not region_name:
-            region_name = self.destination.gps.reverse_geo["place_2"]
 
         # if region is not populated, could use a somewhat rounded lat/lng so we can still include the journey
-
-        return region_name
+        return get_regions([self])[0]
@@ -6,6 +6,7 @@ from networkx.classes.multidigraph import MultiDiGraph
 
 from via import settings
 from via import logger
+from via.metrics import timed
 from via.utils import (
     filter_nodes_from_geodataframe,
     filter_edges_from_geodataframe,
@@ -20,6 +21,7 @@ from via.caches.bounding_graph_gdfs_cache import bounding_graph_gdfs_cache
 
 class SnappedRouteGraphMixin:
     @property
+    @timed("snapped_route_graph")
     def snapped_route_graph(self) -> MultiDiGraph:
         """ """
         start_time = time.monotonic()
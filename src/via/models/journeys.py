@@ -1,14 +1,16 @@
 import statistics
-import hashlib
 from collections import defaultdict
-from typing import List
+from typing import List, Optional, Tuple
 
 from networkx.classes.multidigraph import MultiDiGraph
 
 from via import logger
+from via.caches.region_cache import get_regions
 from via.geojson.utils import geojson_from_graph
+from via.hashing import hash_hashes
 from via.models.generic import GenericObjects
 from via.models.journey import Journey
+from via.models.point_columns import PointSummary
 from via.models.journey_mixins import (
     SnappedRouteGraphMixin,
     BoundingGraphMixin,
@@ -59,33 +61,44 @@ class Journeys(GenericObjects, SnappedRouteGraphMixin, BoundingGraphMixin):
             for edge_id, data in edge_quality_map.items()
         }
 
+    @property
+    def summary(self) -> PointSummary:
+        """
+        Bounds, count and time range of the points of all journeys
+        """
+        return PointSummary.combine(journey.summary for journey in self)
+
+    @property
+    def time_range(self) -> Tuple[Optional[float], Optional[float]]:
+        return self.summary.time_range
+
     @property
     def most_northern(self) -> float:
         """
         Get the most northerly latitude over all journeys
         """
-        return max([journey.most_northern for journey in self])
+        return self.summary.get_bound("north")
 
     @property
     def most_southern(self) -> float:
         """
         Get the most southerly latitude over all journeys
         """
-        return min([journey.most_southern for journey in self])
+        return self.summary.get_bound("south")
 
     @property
     def most_eastern(self) -> float:
         """
         Get the most easterly longitude over all journeys
         """
-        return max([journey.most_eastern for journey in self])
+        return self.summary.get_bound("east")
 
     @property
     def most_western(self) -> float:
         """
         Get the most westerly longitude over all journeys
         """
-        return min([journey.most_western for journey in self])
+        return self.summary.get_bound("west")
 
     def get_graph(self, use_graph_cache=True):
         return self.get_bounding_graph(use_graph_cache=use_graph_cache)
@@ -99,18 +112,14 @@ class Journeys(GenericObjects, SnappedRouteGraphMixin, BoundingGraphMixin):
         """
         Get the hash of all the GPSs of the points in all the journeys
         """
-        return hashlib.md5(
-            str([journey.gps_hash for journey in self]).encode()
-        ).hexdigest()
+        return hash_hashes(journey.gps_hash for journey in self)
 
     @property
     def content_hash(self) -> str:
         """
         Get the hash of the contents of all the journeys
         """
-        return hashlib.md5(
-            str([journey.content_hash for journey in self]).encode()
-        ).hexdigest()
+        return hash_hashes(journey.content_hash for journey in self)
 
     @property
     def used_combined_edges(self):
@@ -122,20 +131,14 @@ class Journeys(GenericObjects, SnappedRouteGraphMixin, BoundingGraphMixin):
 
     @property
     def bbox(self):
-        return {
-            "north": self.most_northern,
-            "south": self.most_southern,
-            "east": self.most_eastern,
-            "west": self.most_western,
-        }
+        return self.summary.bbox
 
     @property
     def geojson(self):
         region_map = defaultdict(Journeys)
 
-        for journey in self:
-            region_name = journey.region
-
+        # All journeys at once rather than journey.region of each
+        for journey, region_name in zip(self, get_regions(self)):
             if region_name:
                 region_map[region_name].append(journey)
             else:
@@ -1,36 +1,69 @@
-import hashlib
+import uuid
 from numbers import Number
+from typing import Optional, Tuple
 
 import numpy
-from cached_property import cached_property
 
 from via import settings
 from via import logger
 from via.caches.place_cache import place_cache
 from via.models.generic import GenericObject, GenericObjects
 from via.models.gps import GPSPoint
+from via.distance import haversine
+from via.hashing import hash_arrays, hash_values
+from via.models.point_columns import PointColumns, PointSummary, SLOW_UNKNOWN
 
 
 class Context:
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    """
+    The points either side of a point. Either given with set_context or,
+    for points of a journey, ranges of indexes around the point
+    """
 
-        self.context_pre = []
-        self.context_post = []
+    # Empty so it can be mixed with GenericObject, subclasses using
+    # __slots__ need to include _context_pre and _context_post
+    __slots__ = ()
 
-    def __del__(self):
-        attrs_to_del = ["content_hash"]
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
 
-        for attr in attrs_to_del:
-            try:
-                delattr(self, attr)
-            except Exception:
-                pass
+        self._context_pre = []
+        self._context_post = []
 
     def set_context(self, pre=None, post=None):
         if not self.is_context_populated:
-            self.context_pre = pre
-            self.context_post = post
+            self._context_pre = pre
+            self._context_post = post
+
+    def _context_ranges(self) -> Optional[Tuple[range, range]]:
+        """
+        :return: (pre, post) indexes of the context, or None if there's no
+            context by index
+        """
+        return None
+
+    def _context_points(self, indexes: range) -> list:  # pragma: nocover
+        raise NotImplementedError()
+
+    @property
+    def _has_given_context(self) -> bool:
+        return self._context_pre != [] and self._context_post != []
+
+    @property
+    def context_pre(self) -> list:
+        if not self._has_given_context:
+            ranges = self._context_ranges()
+            if ranges is not None:
+                return self._context_points(ranges[0])
+        return self._context_pre
+
+    @property
+    def context_post(self) -> list:
+        if not self._has_given_context:
+            ranges = self._context_ranges()
+            if ranges is not None:
+                return self._context_points(ranges[1])
+        return self._context_post
 
     @property
     def is_context_populated(self) -> bool:
@@ -38,7 +71,7 @@ class Context:
         Do we have context forward and back?
         Not all context but at least some on either side
         """
-        return self.context_pre != [] and self.context_post != []
+        return self._has_given_context or self._context_ranges() is not None
 
 
 class FramePoint(Context, GenericObject):
@@ -52,6 +85,19 @@ class FramePoint(Context, GenericObject):
     {gps: (1, 2), acc: 3, time: 3}
     """
 
+    __slots__ = (
+        "_uuid",
+        "_context_pre",
+        "_context_post",
+        "time",
+        "gps",
+        "_slow",
+        "acceleration",
+        "_points",
+        "_index",
+        "_content_hash",
+    )
+
     def __init__(self, time, gps, acceleration, slow=None):
         """
 
@@ -65,21 +111,91 @@ class FramePoint(Context, GenericObject):
         self.time = time
         self.gps = GPSPoint.parse(gps)
         self._slow = slow
+        self.acceleration = FramePoint.clean_acceleration(acceleration)
 
-        if isinstance(acceleration, list):
-            self.acceleration = [
-                acc for acc in acceleration if acc >= settings.MIN_ACC_SCORE
-            ]
-        else:
+        # Set when this is a view of a point stored in a FramePoints
+        self._points = None
+        self._index = None
+
+        self._content_hash = None
+
+    def __setattr__(self, name, value):
+        # Views are made from the columns each time they're asked for, so
+        # changes to one would be lost
+        if name in ("time", "gps", "acceleration") and (
+            getattr(self, "_points", None) is not None
+        ):
+            raise AttributeError(f"Can't set {name} of a point in a FramePoints")
+        super().__setattr__(name, value)
+
+    @property
+    def uuid(self):
+        """
+        Points of a FramePoints are identified by their index in it, so
+        every view of the same point has the same uuid
+        """
+        if self._uuid is None and self._points is not None:
+            self._uuid = uuid.uuid5(
+                uuid.NAMESPACE_OID, f"{self._points.uuid}:{self._index}"
+            )
+        return super().uuid
+
+    @staticmethod
+    def clean_acceleration(acceleration) -> list:
+        """
+        Get acceleration (a list, number or None) as a list without values
+        too small to be meaningful
+        """
+        if not isinstance(acceleration, list):
             if acceleration is None:
                 acceleration = 0
             assert isinstance(acceleration, Number)
-            self.acceleration = [
-                acc for acc in [acceleration] if acc >= settings.MIN_ACC_SCORE
-            ]
+            acceleration = [acceleration]
+        return [acc for acc in acceleration if acc >= settings.MIN_ACC_SCORE]
+
+    @staticmethod
+    def from_points(points, idx: int):
+        """
+        Get a FramePoint view of a point stored in a FramePoints
+        """
+        time, lat, lng, elevation, acceleration, slow = points.columns.get(idx)
+        point = FramePoint(
+            time, GPSPoint(lat, lng, elevation=elevation), acceleration, slow=slow
+        )
+        point.bind(points, idx)
+        return point
+
+    def bind(self, points, idx: int):
+        """
+        Make this a view of the point at idx of points, so accelerations
+        appended to this are also appended there and context comes from
+        the surrounding points. Time, gps and acceleration can't be set
+        after this
+        """
+        self._points = points
+        self._index = idx
+
+    def _context_ranges(self) -> Optional[Tuple[range, range]]:
+        if self._points is None:
+            return None
+        return self._points.context_ranges(self._index)
+
+    def _context_points(self, indexes: range) -> list:
+        return [self._points._get_view(idx) for idx in indexes]
+
+    @property
+    def _from_point_metrics(self) -> bool:
+        """
+        Is speed / slow / road_quality of this read from the arrays of the
+        FramePoints it's in, rather than worked out from given context
+        """
+        return self._points is not None and not self._has_given_context
 
     @property
     def slow(self):
+        if self._from_point_metrics:
+            return self._points.slow_at(self._index)
+
         if self.speed is None:
             return False  # Is this fair?
 
@@ -101,6 +217,9 @@ class FramePoint(Context, GenericObject):
 
         :rtype: float
         """
+        if self._from_point_metrics:
+            return self._points.speed_at(self._index)
+
         if self.is_context_populated:
             origin = self.context_pre[0]
             dst = self.context_post[-1]
@@ -128,6 +247,8 @@ class FramePoint(Context, GenericObject):
         else:
             if acc >= settings.MIN_ACC_SCORE:
                 self.acceleration.append(acc)
+                if self._points is not None:
+                    self._points.columns.append_acceleration(self._index, acc)
 
     @staticmethod
     def parse(obj):
@@ -183,6 +304,9 @@ class FramePoint(Context, GenericObject):
         :return: mean of acceleration points
         :rtype: float
         """
+        if self._from_point_metrics and self._points.has_context(self._index):
+            return int(self._points.road_qualities[self._index])
+
         if self.slow:
             return 0
         if self.acceleration == []:
@@ -222,62 +346,309 @@ class FramePoint(Context, GenericObject):
         """
         return self.gps.content_hash
 
-    @cached_property
+    @property
     def content_hash(self) -> int:
         """
         Get the hash of the contents of this point`
         """
-        input_string = f"{self.acceleration} {self.gps.point} {self.time}"
-        encoded_int = 0
+        if self._content_hash is None:
+            self._content_hash = hash_values(
+                [self.time, self.gps.lat, self.gps.lng] + list(self.acceleration)
+            )
+        return self._content_hash
 
-        for char in input_string:
-            encoded_int = (encoded_int << 8) + ord(char)
-            encoded_int %= 1000000000
 
-        return encoded_int
+class FramePoints(GenericObjects):
+    """
+    Points are stored in PointColumns rather than as FramePoint objects.
+    FramePoint views of points are only made when a point is accessed and
+    aren't kept, so each access gives a new view of the same point
 
+    The context of a point is the points up to context_width either side of
+    it, narrower at the edges
+    """
 
-class FramePoints(GenericObjects):
     def __init__(self, *args, **kwargs):
+        """
+
+        :kwarg context_width: How many points either side of a point to use
+            as its context
+        """
         kwargs.setdefault("child_class", FramePoint)
+        self.context_width = kwargs.get("context_width", settings.CONTEXT_WIDTH)
         super().__init__(*args, **kwargs)
 
+    @property
+    def _data(self):
+        # Points used to be a list of FramePoint here, FramePoints itself
+        # now acts as that list
+        return self
+
+    @_data.setter
+    def _data(self, points):
+        self._columns = PointColumns()
+        # How many points there were when contexts were last set, points
+        # past this have no context
+        self._context_size = None
+        self._point_metrics_key = None
+        self._point_metrics = None
+        self._hashes_key = None
+        self._hashes = None
+        for point in points:
+            FramePoints.append(self, point)
+
+    @property
+    def columns(self) -> PointColumns:
+        return self._columns
+
+    def _get_view(self, idx: int) -> FramePoint:
+        return FramePoint.from_points(self, idx)
+
+    def context_ranges(self, idx: int) -> Optional[Tuple[range, range]]:
+        """
+        :return: (pre, post) indexes of the context of the point at idx, or
+            None if it has no context
+        """
+        if self._context_size is None or idx >= self._context_size:
+            return None
+        width = min(self.context_width, idx, self._context_size - 1 - idx)
+        if width <= 0:
+            return None
+        return (range(idx - width, idx), range(idx + 1, idx + width + 1))
+
+    def _get_point_metrics(self) -> dict:
+        """
+        Work out the speed, slow flag and road quality of every point at
+        once over the columns, the same as FramePoint would point by point.
+        Kept until points, accelerations or contexts change
+
+        :return: {"speed": arr, "moving": arr, "slow": arr, "road_quality": arr}
+            with speed nan where unknown. moving is where speed is a float
+            rather than 0 from not having moved, which is never slow
+        """
+        key = (
+            len(self._columns),
+            len(self._columns.acc),
+            self._context_size,
+            self.context_width,
+            settings.MIN_METRES_PER_SECOND,
+        )
+        if self._point_metrics_key == key:
+            return self._point_metrics
+
+        columns = self._columns
+        size = len(columns)
+
+        speed = numpy.full(size, numpy.nan)
+        moving = numpy.zeros(size, dtype=bool)
+        if self._context_size is not None:
+            idx = numpy.arange(self._context_size)
+            width = numpy.minimum(
+                numpy.minimum(idx, self._context_size - 1 - idx), self.context_width
+            )
+            idx = idx[width > 0]
+            width = width[width > 0]
+            origin = idx - width
+            dst = idx + width
+
+            time_diff = columns.time[dst] - columns.time[origin]
+            distance = haversine(
+                columns.lat[origin],
+                columns.lng[origin],
+                columns.lat[dst],
+                columns.lng[dst],
+            )
+            timed = ~numpy.isnan(time_diff)
+            is_moving = timed & (distance != 0) & (time_diff != 0)
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                metres_per_second = numpy.where(is_moving, distance / time_diff, 0)
+            metres_per_second[~timed] = numpy.nan
+
+            # Python's round so speeds are exactly as FramePoint.speed had them
+            speed[idx] = [round(value, 2) for value in metres_per_second.tolist()]
+            moving[idx] = is_moving
+
+        known = ~numpy.isnan(speed)
+        slow = known & numpy.where(
+            columns.slow != SLOW_UNKNOWN,
+            columns.slow == 1,
+            moving & (speed <= settings.MIN_METRES_PER_SECOND),
+        )
+
+        counts = numpy.diff(columns.acc_offsets)
+        sums = numpy.zeros(size)
+        has_acc = counts > 0
+        if has_acc.any():
+            sums[has_acc] = numpy.add.reduceat(
+                columns.acc, columns.acc_offsets[:-1][has_acc]
+            )
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            road_quality = numpy.trunc(sums / counts * 100)
+        road_quality[~has_acc | slow] = 0
+        road_quality = road_quality.astype(int)
+
+        self._point_metrics_key = key
+        self._point_metrics = {
+            "speed": speed,
+            "moving": moving,
+            "slow": slow,
+            "road_quality": road_quality,
+        }
+        return self._point_metrics
+
+    @property
+    def speeds(self) -> numpy.ndarray:
+        """
+        Speed at each point in metres per second, nan where unknown
+        """
+        return self._get_point_metrics()["speed"]
+
+    @property
+    def slow_flags(self) -> numpy.ndarray:
+        return self._get_point_metrics()["slow"]
+
+    @property
+    def road_qualities(self) -> numpy.ndarray:
+        return self._get_point_metrics()["road_quality"]
+
+    def has_context(self, idx: int) -> bool:
+        return self.context_ranges(idx) is not None
+
+    def speed_at(self, idx: int) -> Optional[float]:
+        """
+        Speed at a point as FramePoint.speed gives it
+        """
+        if not self.has_context(idx):
+            # Saves working out every point's speed when adding to the last
+            return None
+        metrics = self._get_point_metrics()
+        speed = metrics["speed"][idx]
+        if numpy.isnan(speed):
+            return None
+        if not metrics["moving"][idx]:
+            return 0
+        return float(speed)
+
+    def slow_at(self, idx: int) -> bool:
+        if not self.has_context(idx):
+            return False
+        return bool(self._get_point_metrics()["slow"][idx])
+
+    def _gps_at(self, idx: int) -> GPSPoint:
+        lat, lng, elevation = self._columns.get_position(idx)
+        return GPSPoint(lat, lng, elevation=elevation)
+
+    def _time_at(self, idx: int):
+        return self._columns.get_time(idx)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [
+                self._get_view(idx) for idx in range(*i.indices(len(self._columns)))
+            ]
+        if i < 0:
+            i += len(self._columns)
+        if not 0 <= i < len(self._columns):
+            raise IndexError("point index out of range")
+        return self._get_view(i)
+
+    def __iter__(self):
+        return (self._get_view(idx) for idx in range(len(self._columns)))
+
+    def __len__(self):
+        return len(self._columns)
+
+    def append(self, obj) -> None:
+        """
+
+        :param obj: FramePoint or dict serialization of FramePoint
+        """
+        if isinstance(obj, FramePoint):
+            self._append_point(obj)
+        elif isinstance(obj, dict):
+            self._append_values(
+                obj.get("time", None), GPSPoint.parse(obj["gps"]), obj["acc"]
+            )
+        else:
+            raise NotImplementedError(f"Can't parse Point from type {type(obj)}")
+
+    def _append_point(self, point: FramePoint):
+        """
+        Store a FramePoint, making it a view of the stored point
+        """
+        idx = self._columns.append(
+            point.time,
+            point.gps.lat,
+            point.gps.lng,
+            point.gps.elevation,
+            point.acceleration,
+            slow=point._slow,
+        )
+        if point._points is None:
+            point.bind(self, idx)
+
+    def _append_values(self, time, gps: GPSPoint, acceleration, slow=None):
+        """
+        Store a point without making a FramePoint of it
+        """
+        self._columns.append(
+            time,
+            gps.lat,
+            gps.lng,
+            gps.elevation,
+            FramePoint.clean_acceleration(acceleration),
+            slow=slow,
+        )
+
+    def _append_acceleration(self, idx: int, acc):
+        if acc is not None and acc >= settings.MIN_ACC_SCORE:
+            # Journey.append only adds to the last point, which has no context
+            # so can't be slow
+            self._columns.append_acceleration(idx, acc)
+
+    @property
+    def summary(self) -> PointSummary:
+        """
+        Bounds, count and time range of the points, kept up to date as
+        points are added
+        """
+        return self._columns.summary
+
+    @property
+    def time_range(self) -> Tuple[Optional[float], Optional[float]]:
+        return self._columns.summary.time_range
+
     @property
     def most_northern(self) -> float:
         """
         Get the max lat of all points
         """
-        return max([frame.gps.lat for frame in self])
+        return self._columns.summary.get_bound("north")
 
     @property
     def most_southern(self) -> float:
         """
         Get the min lat of all points
         """
-        return min([frame.gps.lat for frame in self])
+        return self._columns.summary.get_bound("south")
 
     @property
     def most_eastern(self) -> float:
         """
         Get the max lng of all points
         """
-        return max([frame.gps.lng for frame in self])
+        return self._columns.summary.get_bound("east")
 
     @property
     def most_western(self) -> float:
         """
         Get the min lng of all points
         """
-        return min([frame.gps.lng for frame in self])
+        return self._columns.summary.get_bound("west")
 
     @property
     def bbox(self) -> dict:
-        return {
-            "north": self.most_northern,
-            "south": self.most_southern,
-            "east": self.most_eastern,
-            "west": self.most_western,
-        }
+        return self._columns.summary.bbox
 
     @property
     def data_quality(self) -> float:
@@ -317,9 +688,14 @@ class FramePoints(GenericObjects):
         :rtype: float
         :return: The number of seconds the journey took
         """
-        if self.destination.time is None or self.origin.time is None:
+        if len(self._columns) == 0:
+            # Same as the IndexError from origin / destination before
+            raise IndexError("point index out of range")
+        origin_time = self._time_at(0)
+        destination_time = self._time_at(len(self._columns) - 1)
+        if destination_time is None or origin_time is None:
             return None
-        return self.destination.time - self.origin.time
+        return destination_time - origin_time
 
     @property
     def direct_distance(self) -> float:
@@ -328,7 +704,7 @@ class FramePoints(GenericObjects):
         :rtype: float
         :return: distance from origin to destination in metres
         """
-        return self[0].distance_from(self[-1])
+        return self._gps_at(0).distance_from(self._gps_at(len(self._columns) - 1))
 
     def serialize(
         self, include_time: bool = False, include_context: bool = True
@@ -338,23 +714,61 @@ class FramePoints(GenericObjects):
             for frame in self
         ]
 
+    def serialize_compact(self, include_time: bool = True) -> dict:
+        """
+        Serialize as columns, with context as the width of it rather than
+        copies of the points around every point. Read with load_compact
+        """
+        data = self._columns.serialize(include_time=include_time)
+        data["context_width"] = self.context_width
+        data["context_size"] = self._context_size
+        return data
+
+    def load_compact(self, data: dict):
+        """
+        Take the points and contexts of serialize_compact
+        """
+        if len(self._columns) != 0:
+            raise ValueError("Can only load compact points when empty")
+
+        self._data = []
+        self._columns = PointColumns.parse(data)
+        self.context_width = data["context_width"]
+        self._context_size = data["context_size"]
+
+    def _get_hashes(self) -> dict:
+        """
+        Hashes of the columns, kept until points or accelerations are added
+        """
+        key = (len(self._columns), len(self._columns.acc))
+        if self._hashes_key != key:
+            columns = self._columns
+            self._hashes = {
+                "gps": hash_arrays(columns.lat, columns.lng, columns.elevation),
+                "content": hash_arrays(
+                    columns.time,
+                    columns.lat,
+                    columns.lng,
+                    columns.acc,
+                    columns.acc_offsets,
+                ),
+            }
+            self._hashes_key = key
+        return self._hashes
+
     @property
     def gps_hash(self) -> str:
         """
         Get the hash of all the GPSs of all of the points
         """
-        return hashlib.md5(
-            str([point.gps.content_hash for point in self]).encode()
-        ).hexdigest()
+        return self._get_hashes()["gps"]
 
     @property
     def content_hash(self) -> str:
         """
         Get the hash of all the data of all of the points
         """
-        return hashlib.md5(
-            str([point.content_hash for point in self]).encode()
-        ).hexdigest()
+        return self._get_hashes()["content"]
 
     def is_in_place(self, place_name: str) -> bool:
         """
@@ -0,0 +1,395 @@
+import math
+from numbers import Number
+from typing import Iterable, List, Optional, Tuple
+
+import numpy
+
+
+INITIAL_CAPACITY = 16
+
+SLOW_UNKNOWN = -1
+
+
+def _to_float(value: Optional[Number]) -> float:
+    return math.nan if value is None else value
+
+
+def _from_float(value: float) -> Optional[float]:
+    return None if math.isnan(value) else float(value)
+
+
+def _is_known(value: Optional[Number]) -> bool:
+    return value is not None and value == value
+
+
+def _to_list(arr: numpy.ndarray) -> List[Optional[float]]:
+    return [None if value != value else value for value in arr.tolist()]
+
+
+class PointSummary:
+    """
+    Bounds, count and time range of some points, kept up to date as points
+    are added so they never need to be scanned for. Bounds and times are
+    nan until there's a point with them
+    """
+
+    __slots__ = ("count", "north", "south", "east", "west", "earliest", "latest")
+
+    def __init__(self):
+        self.count = 0
+        self.north = math.nan
+        self.south = math.nan
+        self.east = math.nan
+        self.west = math.nan
+        self.earliest = math.nan
+        self.latest = math.nan
+
+    def add(self, time: Optional[float], lat: Optional[float], lng: Optional[float]):
+        self.count += 1
+        if _is_known(lat):
+            lat = float(lat)
+            self.north = lat if math.isnan(self.north) else max(self.north, lat)
+            self.south = lat if math.isnan(self.south) else min(self.south, lat)
+        if _is_known(lng):
+            lng = float(lng)
+            self.east = lng if math.isnan(self.east) else max(self.east, lng)
+            self.west = lng if math.isnan(self.west) else min(self.west, lng)
+        if _is_known(time):
+            time = float(time)
+            self.latest = time if math.isnan(self.latest) else max(self.latest, time)
+            self.earliest = (
+                time if math.isnan(self.earliest) else min(self.earliest, time)
+            )
+
+    def get_bound(self, side: str) -> float:
+        """
+        :param side: north / south / east / west
+        """
+        value = getattr(self, side)
+        if math.isnan(value):
+            # Same as max / min of no points
+            raise ValueError("no points with gps to get bounds of")
+        return value
+
+    @property
+    def time_range(self) -> Tuple[Optional[float], Optional[float]]:
+        """
+        :return: (earliest, latest) time of the points, None if no points
+            have a time
+        """
+        if math.isnan(self.earliest):
+            return (None, None)
+        return (self.earliest, self.latest)
+
+    @property
+    def bbox(self) -> dict:
+        return {
+            side: self.get_bound(side) for side in ["north", "south", "east", "west"]
+        }
+
+    @staticmethod
+    def from_arrays(
+        time: numpy.ndarray, lat: numpy.ndarray, lng: numpy.ndarray
+    ) -> "PointSummary":
+        summary = PointSummary()
+        summary.count = len(time)
+
+        def bounds(arr):
+            known = arr[~numpy.isnan(arr)]
+            if len(known) == 0:
+                return (math.nan, math.nan)
+            return (float(known.min()), float(known.max()))
+
+        summary.south, summary.north = bounds(lat)
+        summary.west, summary.east = bounds(lng)
+        summary.earliest, summary.latest = bounds(time)
+        return summary
+
+    @staticmethod
+    def combine(summaries: Iterable["PointSummary"]) -> "PointSummary":
+        """
+        Get the summary of all the points of the summaries
+        """
+        combined = PointSummary()
+        for summary in summaries:
+            combined.count += summary.count
+            combined.north = numpy.fmax(combined.north, summary.north)
+            combined.south = numpy.fmin(combined.south, summary.south)
+            combined.east = numpy.fmax(combined.east, summary.east)
+            combined.west = numpy.fmin(combined.west, summary.west)
+            combined.earliest = numpy.fmin(combined.earliest, summary.earliest)
+            combined.latest = numpy.fmax(combined.latest, summary.latest)
+
+        for attr in ["north", "south", "east", "west", "earliest", "latest"]:
+            setattr(combined, attr, float(getattr(combined, attr)))
+        return combined
+
+
+class PointColumns:
+    """
+    Columnar storage of the points of a journey
+
+    Each point is a row across the time / lat / lng / elevation / slow
+    arrays, with None stored as nan (or SLOW_UNKNOWN for slow).
+    Accelerations vary in number per point so are in one flat array, the
+    accelerations of point i being acc[acc_offsets[i]:acc_offsets[i + 1]]
+
+    Arrays grow by doubling so appending is amortised O(1)
+    """
+
+    def __init__(self):
+        self._size = 0
+        self._acc_size = 0
+        self.summary = PointSummary()
+
+        self._time = numpy.empty(INITIAL_CAPACITY)
+        self._lat = numpy.empty(INITIAL_CAPACITY)
+        self._lng = numpy.empty(INITIAL_CAPACITY)
+        self._elevation = numpy.empty(INITIAL_CAPACITY)
+        self._slow = numpy.empty(INITIAL_CAPACITY, dtype=numpy.int8)
+        self._acc_offsets = numpy.zeros(INITIAL_CAPACITY + 1, dtype=numpy.int64)
+        self._acc = numpy.empty(INITIAL_CAPACITY)
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def from_arrays(
+        time: numpy.ndarray,
+        lat: numpy.ndarray,
+        lng: numpy.ndarray,
+        elevation: numpy.ndarray,
+        slow: numpy.ndarray,
+        acc: numpy.ndarray,
+        acc_offsets: numpy.ndarray,
+    ):
+        """
+        Make columns from whole arrays at once rather than point by point
+
+        :param slow: int8 array of 1 / 0 / SLOW_UNKNOWN
+        :param acc_offsets: the accelerations of point i are
+            acc[acc_offsets[i]:acc_offsets[i + 1]]
+        """
+        columns = PointColumns()
+        columns._size = len(time)
+        columns._acc_size = len(acc)
+        columns._time = numpy.array(time, dtype=float)
+        columns._lat = numpy.array(lat, dtype=float)
+        columns._lng = numpy.array(lng, dtype=float)
+        columns._elevation = numpy.array(elevation, dtype=float)
+        columns._slow = numpy.array(slow, dtype=numpy.int8)
+        columns._acc = numpy.array(acc, dtype=float)
+        columns._acc_offsets = numpy.array(acc_offsets, dtype=numpy.int64)
+        columns.summary = PointSummary.from_arrays(
+            columns.time, columns.lat, columns.lng
+        )
+        return columns
+
+    def slice(self, start: int, stop: int) -> "PointColumns":
+        """
+        Get a copy of the points from start up to stop
+        """
+        acc_start = self.acc_offsets[start]
+        acc_stop = self.acc_offsets[stop]
+        return PointColumns.from_arrays(
+            self.time[start:stop],
+            self.lat[start:stop],
+            self.lng[start:stop],
+            self.elevation[start:stop],
+            self.slow[start:stop],
+            self.acc[acc_start:acc_stop],
+            self.acc_offsets[start : stop + 1] - acc_start,
+        )
+
+    def serialize(self, include_time: bool = True) -> dict:
+        """
+        The columns as lists, None where unknown
+
+        :kwarg include_time: Leave out the times, they're None when parsed
+        """
+        data = {
+            "lat": _to_list(self.lat),
+            "lng": _to_list(self.lng),
+            "elevation": _to_list(self.elevation),
+            "slow": [
+                None if slow == SLOW_UNKNOWN else bool(slow)
+                for slow in self.slow.tolist()
+            ],
+            "acc": self.acc.tolist(),
+            "acc_offsets": self.acc_offsets.tolist(),
+        }
+        if include_time:
+            data["time"] = _to_list(self.time)
+        return data
+
+    @staticmethod
+    def parse(data: dict) -> "PointColumns":
+        """
+        Get columns back from PointColumns.serialize
+        """
+        size = len(data["lat"])
+        time = data.get("time", None)
+        return PointColumns.from_arrays(
+            numpy.full(size, numpy.nan) if time is None else numpy.array(time, float),
+            numpy.array(data["lat"], dtype=float),
+            numpy.array(data["lng"], dtype=float),
+            numpy.array(data["elevation"], dtype=float),
+            numpy.array(
+                [SLOW_UNKNOWN if slow is None else int(slow) for slow in data["slow"]],
+                dtype=numpy.int8,
+            ),
+            numpy.array(data["acc"], dtype=float),
+            numpy.array(data["acc_offsets"], dtype=numpy.int64),
+        )
+
+    @staticmethod
+    def _grown(arr: numpy.ndarray, min_size: int) -> numpy.ndarray:
+        if min_size <= len(arr):
+            return arr
+        grown = numpy.empty(max(min_size, len(arr) * 2), dtype=arr.dtype)
+        grown[: len(arr)] = arr
+        return grown
+
+    def append(
+        self,
+        time: Optional[float],
+        lat: Optional[float],
+        lng: Optional[float],
+        elevation: Optional[float],
+        acceleration: List[float],
+        slow: Optional[bool] = None,
+    ) -> int:
+        """
+        Add a point
+
+        :return: The index of the point
+        """
+        idx = self._size
+        self._time = self._grown(self._time, idx + 1)
+        self._lat = self._grown(self._lat, idx + 1)
+        self._lng = self._grown(self._lng, idx + 1)
+        self._elevation = self._grown(self._elevation, idx + 1)
+        self._slow = self._grown(self._slow, idx + 1)
+        self._acc_offsets = self._grown(self._acc_offsets, idx + 2)
+
+        self._time[idx] = _to_float(time)
+        self._lat[idx] = _to_float(lat)
+        self._lng[idx] = _to_float(lng)
+        self._elevation[idx] = _to_float(elevation)
+        self._slow[idx] = SLOW_UNKNOWN if slow is None else int(slow)
+
+        acc_end = self._acc_size + len(acceleration)
+        self._acc = self._grown(self._acc, acc_end)
+        self._acc[self._acc_size : acc_end] = acceleration
+        self._acc_size = acc_end
+        self._acc_offsets[idx + 1] = acc_end
+
+        self.summary.add(time, lat, lng)
+        self._size += 1
+        return idx
+
+    def append_acceleration(self, idx: int, acc: float):
+        """
+        Add an acceleration to the point at idx. Quick for the last point,
+        which is the only one Journey.append adds to
+        """
+        if idx == self._size - 1:
+            self._acc = self._grown(self._acc, self._acc_size + 1)
+            self._acc[self._acc_size] = acc
+        else:
+            end = self._acc_offsets[idx + 1]
+            self._acc = numpy.insert(self._acc[: self._acc_size], end, acc)
+            self._acc_offsets[idx + 2 : self._size + 1] += 1
+
+        self._acc_size += 1
+        self._acc_offsets[idx + 1] += 1
+
+    def get(self, idx: int) -> Tuple[
+        Optional[float],
+        Optional[float],
+        Optional[float],
+        Optional[float],
+        List[float],
+        Optional[bool],
+    ]:
+        """
+        :return: (time, lat, lng, elevation, acceleration, slow) of a point
+            as python types
+        """
+        slow = int(self._slow[idx])
+        return (
+            _from_float(self._time[idx]),
+            _from_float(self._lat[idx]),
+            _from_float(self._lng[idx]),
+            _from_float(self._elevation[idx]),
+            self.get_acceleration(idx),
+            None if slow == SLOW_UNKNOWN else bool(slow),
+        )
+
+    def get_time(self, idx: int) -> Optional[float]:
+        return _from_float(self._time[idx])
+
+    def get_position(
+        self, idx: int
+    ) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """
+        :return: (lat, lng, elevation) of a point as python types
+        """
+        return (
+            _from_float(self._lat[idx]),
+            _from_float(self._lng[idx]),
+            _from_float(self._elevation[idx]),
+        )
+
+    def get_acceleration(self, idx: int) -> List[float]:
+        return self._acc[self._acc_offsets[idx] : self._acc_offsets[idx + 1]].tolist()
+
+    @property
+    def time(self) -> numpy.ndarray:
+        return self._time[: self._size]
+
+    @property
+    def lat(self) -> numpy.ndarray:
+        return self._lat[: self._size]
+
+    @property
+    def lng(self) -> numpy.ndarray:
+        return self._lng[: self._size]
+
+    @property
+    def elevation(self) -> numpy.ndarray:
+        return self._elevation[: self._size]
+
+    @property
+    def slow(self) -> numpy.ndarray:
+        """
+        1 / 0 if the point was marked as slow / not slow, SLOW_UNKNOWN if not
+        marked either way
+        """
+        return self._slow[: self._size]
+
+    @property
+    def acc(self) -> numpy.ndarray:
+        return self._acc[: self._acc_size]
+
+    @property
+    def acc_offsets(self) -> numpy.ndarray:
+        return self._acc_offsets[: self._size + 1]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory used by the arrays, including spare capacity
+        """
+        return sum(
+            arr.nbytes
+            for arr in [
+                self._time,
+                self._lat,
+                self._lng,
+                self._elevation,
+                self._slow,
+                self._acc_offsets,
+                self._acc,
+            ]
+        )
@@ -13,6 +13,20 @@ MAX_METRES_PER_SECOND = float(
 # Raise to use more memory for faster processing, lower if memory is an issue
 MAX_CACHE_SIZE = int(os.getenv("MAX_CACHE_SIZE", 100))
 
+# Entries kept in the memo caches of distances between gps points and of
+# edges looked up in networks. Least recently used entries are evicted
+HAVERSINE_CACHE_SIZE = int(os.getenv("HAVERSINE_CACHE_SIZE", 100000))
+EDGE_CACHE_SIZE = int(os.getenv("EDGE_CACHE_SIZE", 100000))
+
+# Reverse geocoded regions are cached per cell of a grid this many degrees
+# wide, about 1km. Cells kept in memory, all are kept in mongo
+REGION_GRID_DEGREES = float(os.getenv("REGION_GRID_DEGREES", "0.01"))
+REGION_CACHE_SIZE = int(os.getenv("REGION_CACHE_SIZE", 100000))
+
+# How many points either side of a point are used as its context, for
+# things like speed
+CONTEXT_WIDTH = int(os.getenv("CONTEXT_WIDTH", 3))
+
 # The minimum number of edges to a valid journey
 MIN_EDGES_PER_JOURNEY = 5
 
@@ -29,21 +43,51 @@ CUSTOM_OVERPASS_API = os.getenv("CUSTOM_OVERPASS_API", None)
 
 MAX_JOURNEY_METRES_SQUARED = 5e7  # 50km^2
 
+# Largest request body accepted once decompressed
+MAX_REQUEST_BODY_BYTES = int(os.getenv("MAX_REQUEST_BODY_BYTES", 100 * 1024 * 1024))
+
 MAX_GEOJSON_AGE = (
     60 * 60
 )  # How long to cache served geojson files before generating again (using new data)
 
+# How often the generation worker regenerates the default geojson
+GEOJSON_GENERATE_INTERVAL = int(os.getenv("GEOJSON_GENERATE_INTERVAL", 60 * 60))
+
+# How long the api waits on a generation job before telling the client to
+# come back later
+GEOJSON_GENERATE_WAIT = float(os.getenv("GEOJSON_GENERATE_WAIT", 30))
+
+# How long a worker holds a job before it's considered dead and the job is
+# given to another worker. Renewed while the job is running
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 5 * 60))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+
+# Port the generation worker serves prometheus metrics on, 0 to not serve
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", 8001))
+
+# Zoom levels to pre-cut vector tiles for. Clients overzoom past the max
+TILE_MIN_ZOOM = int(os.getenv("TILE_MIN_ZOOM", "10"))
+TILE_MAX_ZOOM = int(os.getenv("TILE_MAX_ZOOM", "16"))
+
 if os.getenv("TEST_ENV", "False") == "True":
     MONGO_RAW_JOURNEYS_COLLECTION = "test_raw_journeys"
     MONGO_NETWORKS_COLLECTION = "test_networks"
+    MONGO_SYNC_STATE_COLLECTION = "test_sync_state"
+    MONGO_JOBS_COLLECTION = "test_jobs"
+    MONGO_REGIONS_COLLECTION = "test_regions"
     GRIDFS_NETWORK_FILENAME_PREFIX = "test_network"
     GRIDFS_BOUNDING_GRAPH_GDFS_GRAPH_FILENAME_PREFIX = "test_bounding_graph_gdfs_graph"
     NXMAP_FILENAME_PREFIX = "test_nxmap"
     GEOJSON_FILENAME_PREFIX = "test_geo"
+    TILE_FILENAME_PREFIX = "test_tiles"
 else:  # pragma: nocover
     MONGO_RAW_JOURNEYS_COLLECTION = "raw_journeys"
     MONGO_NETWORKS_COLLECTION = "networks"
+    MONGO_SYNC_STATE_COLLECTION = "sync_state"
+    MONGO_JOBS_COLLECTION = "jobs"
+    MONGO_REGIONS_COLLECTION = "regions"
     GRIDFS_NETWORK_FILENAME_PREFIX = "network"
     GRIDFS_BOUNDING_GRAPH_GDFS_GRAPH_FILENAME_PREFIX = "bounding_graph_gdfs_graph"
     NXMAP_FILENAME_PREFIX = "nxmap"
     GEOJSON_FILENAME_PREFIX = "geo"
+    TILE_FILENAME_PREFIX = "tiles"
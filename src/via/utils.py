@@ -11,7 +11,6 @@ from via import logger
 from via.settings import (
     MIN_JOURNEY_VERSION,
     MAX_JOURNEY_VERSION,
-    MAX_JOURNEY_METRES_SQUARED,
     MAX_CACHE_SIZE,
 )
 from via.constants import METRES_PER_DEGREE
@@ -93,7 +92,7 @@ def iter_journeys(
     # latest_time=latest_time,
 
     for raw_journey in db.raw_journeys.find():
-        yield Journey(**raw_journey)
+        yield Journey.from_raw(**raw_journey)
 
 
 def should_include_journey(
@@ -125,11 +124,6 @@ def should_include_journey(
         if journey.timestamp > latest_time:
             return False
 
-    # is is larger than 50km2
-    # in time will split these into smaller journeys internally
-    if journey.area > MAX_JOURNEY_METRES_SQUARED:
-        return False
-
     if not journey.has_enough_data:
         return False
 
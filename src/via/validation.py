@@ -0,0 +1,124 @@
+from typing import Any, List, Mapping
+
+import numpy
+
+from via import settings
+from via.distance import consecutive_distances
+from via.constants import VALID_JOURNEY_MIN_POINTS, VALID_JOURNEY_MAX_TIME_JITTER
+
+
+def raw_data_to_arrays(data: List[Mapping[str, Any]]) -> Mapping[str, numpy.ndarray]:
+    """
+    Get the data of a raw journey as arrays rather than a list of dicts
+
+    :param data: list of {"acc": float, "gps": [lat, lng], "time": float},
+        gps may also be {"lat": lat, "lng": lng}
+    :return: {"time": arr, "acc": arr, "lat": arr, "lng": arr} with missing
+        values as nan
+    """
+    lats = []
+    lngs = []
+    for point in data:
+        gps = point["gps"]
+        if isinstance(gps, dict):
+            lats.append(gps["lat"])
+            lngs.append(gps["lng"])
+        else:
+            lats.append(gps[0])
+            lngs.append(gps[1])
+
+    return {
+        "time": numpy.array([point.get("time", None) for point in data], dtype=float),
+        "acc": numpy.array([point["acc"] for point in data], dtype=float),
+        "lat": numpy.array(lats, dtype=float),
+        "lng": numpy.array(lngs, dtype=float),
+    }
+
+
+def arrays_to_raw_data(
+    time: numpy.ndarray, acc: numpy.ndarray, lat: numpy.ndarray, lng: numpy.ndarray
+) -> List[Mapping[str, Any]]:
+    """
+    Inverse of raw_data_to_arrays, nan values become None
+
+    :return: list of {"acc": float, "gps": [lat, lng], "time": float}
+    """
+
+    def clean(values):
+        return [None if value != value else value for value in values.tolist()]
+
+    return [
+        {"acc": point_acc, "gps": [point_lat, point_lng], "time": point_time}
+        for point_time, point_acc, point_lat, point_lng in zip(
+            clean(time), clean(acc), clean(lat), clean(lng)
+        )
+    ]
+
+
+def validate_journey_arrays(
+    time: numpy.ndarray, acc: numpy.ndarray, lat: numpy.ndarray, lng: numpy.ndarray
+) -> None:
+    """
+    Check a journey has usable data without building a Journey
+
+    :raises ValueError: describing the first problem found
+    """
+    if not len(time) == len(acc) == len(lat) == len(lng):
+        raise ValueError("time, acc, lat and lng must be the same length")
+
+    if len(lat) == 0:
+        raise ValueError("journey has no data")
+
+    # nan too, the json schema requires acc so packed uploads must have it
+    if not numpy.isfinite(acc).all():
+        raise ValueError("acc must be finite")
+
+    # Same as GPSPoint.is_populated, 0 is sent when there is no gps
+    populated = numpy.isfinite(lat) & numpy.isfinite(lng) & (lat != 0) & (lng != 0)
+    populated_count = int(populated.sum())
+
+    if populated_count < VALID_JOURNEY_MIN_POINTS:
+        raise ValueError(
+            f"journey has {populated_count} gps points, {VALID_JOURNEY_MIN_POINTS} required"
+        )
+
+    gps_lat = lat[populated]
+    gps_lng = lng[populated]
+    if (numpy.abs(gps_lat) > 90).any() or (numpy.abs(gps_lng) > 180).any():
+        raise ValueError("gps out of range")
+
+    # Chronological, though allowed to be reversed. Timestamps from gps and
+    # the accelerometer interleave so allow a little jitter
+    known_time = time[numpy.isfinite(time)]
+    if len(known_time) >= 2:
+        time_diffs = numpy.diff(known_time)
+        if known_time[-1] < known_time[0]:
+            time_diffs = -time_diffs
+        if (time_diffs < -VALID_JOURNEY_MAX_TIME_JITTER).any():
+            raise ValueError("journey is not chronological")
+
+    gps_time = time[populated]
+    timed = numpy.isfinite(gps_time)
+    if timed.sum() >= 2:
+        duration = abs(gps_time[timed][-1] - gps_time[timed][0])
+        if duration > 0:
+            distance = consecutive_distances(gps_lat, gps_lng).sum()
+            if distance / duration > settings.MAX_METRES_PER_SECOND:
+                raise ValueError(
+                    f"journey average speed of {distance / duration:.1f}m/s is too fast"
+                )
+
+
+def validate_journey_data(data: List[Mapping[str, Any]]) -> None:
+    """
+    Check the raw data of a journey has usable data without building a Journey
+
+    :param data: list of {"acc": float, "gps": [lat, lng], "time": float}
+    :raises ValueError: describing the first problem found
+    """
+    try:
+        arrays = raw_data_to_arrays(data)
+    except (KeyError, IndexError, TypeError, ValueError) as ex:
+        raise ValueError(f"malformed data: {ex!r}")
+
+    validate_journey_arrays(**arrays)
@@ -0,0 +1,111 @@
+import asyncio
+import gzip
+import json
+import zlib
+
+from unittest import TestCase
+
+import numpy
+import zstandard
+from fastapi import HTTPException
+from mock import patch
+
+from via.api.encoding import (
+    DecompressingRequest,
+    decompress,
+    decode_packed_journey_data,
+    encode_packed_journey_data,
+    stream_json_list,
+)
+
+
+class DecompressTest(TestCase):
+    def test_gzip(self):
+        self.assertEqual(decompress(gzip.compress(b"abc"), "gzip"), b"abc")
+
+    def test_deflate(self):
+        self.assertEqual(decompress(zlib.compress(b"abc"), "deflate"), b"abc")
+
+    def test_zstd(self):
+        self.assertEqual(
+            decompress(zstandard.ZstdCompressor().compress(b"abc"), "zstd"), b"abc"
+        )
+
+    def test_multiple(self):
+        self.assertEqual(
+            decompress(
+                zstandard.ZstdCompressor().compress(gzip.compress(b"abc")),
+                "gzip, zstd",
+            ),
+            b"abc",
+        )
+        self.assertEqual(decompress(b"abc", "identity"), b"abc")
+
+    def test_unsupported(self):
+        with self.assertRaises(HTTPException) as ctx:
+            decompress(b"abc", "br")
+        self.assertEqual(ctx.exception.status_code, 415)
+
+    def test_corrupt(self):
+        with self.assertRaises(HTTPException) as ctx:
+            decompress(b"abc", "gzip")
+        self.assertEqual(ctx.exception.status_code, 400)
+
+    @patch("via.api.encoding.MAX_REQUEST_BODY_BYTES", 10)
+    def test_too_large(self):
+        for body, encoding in [
+            (gzip.compress(b"a" * 100), "gzip"),
+            (zstandard.ZstdCompressor().compress(b"a" * 100), "zstd"),
+        ]:
+            with self.assertRaises(HTTPException) as ctx:
+                decompress(body, encoding)
+            self.assertEqual(ctx.exception.status_code, 413)
+
+
+class DecompressingRequestTest(TestCase):
+    def test_body(self):
+        async def receive():
+            return {
+                "type": "http.request",
+                "body": gzip.compress(b"abc"),
+                "more_body": False,
+            }
+
+        request = DecompressingRequest(
+            {"type": "http", "headers": [(b"content-encoding", b"gzip")]}, receive
+        )
+        with patch(
+            "via.api.encoding.asyncio.to_thread", wraps=asyncio.to_thread
+        ) as to_thread:
+            self.assertEqual(asyncio.run(request.body()), b"abc")
+        # Decompressed off the event loop
+        to_thread.assert_called_once()
+
+
+class PackedJourneyDataTest(TestCase):
+    def test_round_trip(self):
+        arrays = {
+            "time": numpy.array([0, 1, numpy.nan]),
+            "acc": numpy.array([0.1, 0.2, 0.3]),
+            "lat": numpy.array([53.1, numpy.nan, 53.2]),
+            "lng": numpy.array([-6.1, numpy.nan, -6.2]),
+        }
+        body = encode_packed_journey_data(**arrays)
+        self.assertEqual(len(body), 3 * 32)
+
+        decoded = decode_packed_journey_data(body)
+        for name, values in arrays.items():
+            numpy.testing.assert_array_equal(decoded[name], values)
+
+    def test_bad_length(self):
+        with self.assertRaises(ValueError):
+            decode_packed_journey_data(b"a" * 33)
+
+
+class StreamJsonListTest(TestCase):
+    def test_stream_json_list(self):
+        for items in [[], ["a"], ["a", "b", "c"], list(range(2500))]:
+            self.assertEqual(
+                json.loads("".join(stream_json_list(iter(items), chunk_size=2))),
+                items,
+            )
@@ -0,0 +1,177 @@
+import os
+import time
+
+from unittest import TestCase, skipUnless
+
+from fastapi.testclient import TestClient
+from mock import patch
+from prometheus_client import REGISTRY
+
+from via.api.main import app
+from via.db import db
+from via.geojson.tiles import CURRENT_TILES, cut_tiles, get_tiles_id, store_tiles
+
+from ..geojson.test_tiles import GEOJSON
+from ..utils import wipe_mongo
+
+
+IS_ACTION = os.environ.get("IS_ACTION", "False") == "True"
+
+
+def make_raw_journey(uuid: str, points: int = 20) -> dict:
+    return {
+        "uuid": uuid,
+        "device": "test",
+        "data": [
+            {"time": idx, "acc": 1, "gps": [53.35 + idx / 100000, -6.26]}
+            for idx in range(points)
+        ],
+    }
+
+
+class ApiTest(TestCase):
+    def setUp(self):
+        wipe_mongo()
+        get_tiles_id.cache_clear()
+        CURRENT_TILES.clear()
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        wipe_mongo()
+        get_tiles_id.cache_clear()
+        CURRENT_TILES.clear()
+
+
+class PushJourneysTest(ApiTest):
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_push_journeys(self):
+        response = self.client.post("/push_journey", json=make_raw_journey("old"))
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post(
+            "/push_journeys",
+            json=[
+                make_raw_journey("new"),
+                make_raw_journey("old"),
+                make_raw_journey("invalid", points=2),
+                make_raw_journey("new"),
+                make_raw_journey("other"),
+            ],
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                (result["uuid"], result["status_code"])
+                for result in response.json()["results"]
+            ],
+            [
+                ("new", 201),
+                ("old", 409),
+                ("invalid", 422),
+                ("new", 409),
+                ("other", 201),
+            ],
+        )
+        self.assertEqual(
+            sorted(journey["uuid"] for journey in db.raw_journeys.find()),
+            ["new", "old", "other"],
+        )
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_push_journeys_empty(self):
+        response = self.client.post("/push_journeys", json=[])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"results": []})
+
+
+class GetJourneyUuidsTest(ApiTest):
+    def setUp(self):
+        super().setUp()
+        if not IS_ACTION:
+            for uuid in ["a", "b", "c", "d"]:
+                db.insert_raw_journey(make_raw_journey(uuid))
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_get_journey_uuids(self):
+        response = self.client.get("/get_journey_uuids")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), ["a", "b", "c", "d"])
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_get_journey_uuids_paged(self):
+        response = self.client.get("/get_journey_uuids", params={"limit": 2})
+        self.assertEqual(response.json(), ["a", "b"])
+
+        response = self.client.get(
+            "/get_journey_uuids", params={"after": "b", "limit": 2}
+        )
+        self.assertEqual(response.json(), ["c", "d"])
+
+        response = self.client.get("/get_journey_uuids", params={"after": "d"})
+        self.assertEqual(response.json(), [])
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_get_journey_uuids_since(self):
+        response = self.client.get("/get_journey_uuids", params={"since": 0})
+        self.assertEqual(response.json(), ["a", "b", "c", "d"])
+
+        response = self.client.get(
+            "/get_journey_uuids", params={"since": time.time() + 60}
+        )
+        self.assertEqual(response.json(), [])
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_get_journey_uuids_bad_params(self):
+        response = self.client.get("/get_journey_uuids", params={"after": "nope"})
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get("/get_journey_uuids", params={"limit": 0})
+        self.assertEqual(response.status_code, 422)
+
+
+class TilesTest(ApiTest):
+    def test_tile_out_of_range(self):
+        self.assertEqual(self.client.get("/tiles/2/0/0").status_code, 404)
+        self.assertEqual(self.client.get("/tiles/10/1024/0").status_code, 404)
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_tiles(self):
+        self.assertEqual(self.client.get("/tiles/10/494/331").status_code, 404)
+        get_tiles_id.cache_clear()
+
+        store_tiles(
+            cut_tiles(GEOJSON, min_zoom=10, max_zoom=10),
+            {"journey_type": "bike", "geojson_place": None},
+        )
+
+        response = self.client.get("/tiles/10/494/331")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.headers["content-type"], "application/vnd.mapbox-vector-tile"
+        )
+        self.assertTrue(len(response.content) > 0)
+
+        self.assertEqual(self.client.get("/tiles/10/0/0").status_code, 204)
+
+
+class TimeRequestsTest(ApiTest):
+    def get_count(self, status_code):
+        return (
+            REGISTRY.get_sample_value(
+                "via_request_seconds_count",
+                {"method": "GET", "route": "/metrics", "status_code": status_code},
+            )
+            or 0
+        )
+
+    def test_time_requests(self):
+        count = self.get_count("200")
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+        self.assertEqual(self.get_count("200"), count + 1)
+
+    def test_time_requests_error(self):
+        count = self.get_count("500")
+        client = TestClient(app, raise_server_exceptions=False)
+        with patch("via.api.main.metrics.render", side_effect=RuntimeError):
+            self.assertEqual(client.get("/metrics").status_code, 500)
+        self.assertEqual(self.get_count("500"), count + 1)
@@ -0,0 +1,60 @@
+import asyncio
+
+from unittest import TestCase
+
+from via.api.single_flight import SingleFlight
+
+
+class SingleFlightTest(TestCase):
+    def test_coalesces(self):
+        calls = []
+
+        async def work():
+            calls.append(1)
+            count = len(calls)
+            await asyncio.sleep(0.01)
+            return count
+
+        async def run():
+            single_flight = SingleFlight()
+            results = await asyncio.gather(
+                *[single_flight.do("key", work) for _ in range(5)],
+                single_flight.do("other", work),
+            )
+            self.assertEqual(single_flight.in_flight, {})
+            # Nothing in flight so runs again
+            results.append(await single_flight.do("key", work))
+            return results
+
+        self.assertEqual(asyncio.run(run()), [1, 1, 1, 1, 1, 2, 3])
+
+    def test_exception_shared(self):
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("nope")
+
+        async def run():
+            single_flight = SingleFlight()
+            return await asyncio.gather(
+                single_flight.do("key", work),
+                single_flight.do("key", work),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    def test_cancelled_caller(self):
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def run():
+            single_flight = SingleFlight()
+            first = asyncio.ensure_future(single_flight.do("key", work))
+            second = asyncio.ensure_future(single_flight.do("key", work))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(run()), "done")
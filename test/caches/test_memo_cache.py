@@ -0,0 +1,63 @@
+from unittest import TestCase
+
+from prometheus_client import REGISTRY
+
+from via.caches.memo_cache import MemoCache
+
+
+def get_value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MemoCacheTest(TestCase):
+    def test_counts(self):
+        cache = MemoCache("test_counts", 2)
+
+        cache["a"] = 1
+        self.assertEqual(cache["a"], 1)
+        with self.assertRaises(KeyError):
+            cache["b"]
+
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.evictions, 0)
+
+    def test_evicts_least_recently_used(self):
+        cache = MemoCache("test_evicts", 2)
+
+        cache["a"] = 1
+        cache["b"] = 2
+        cache["a"]
+        cache["c"] = 3
+
+        self.assertEqual(len(cache), 2)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_metrics(self):
+        cache = MemoCache("test_metrics", 1)
+
+        cache["a"] = 1
+        cache["a"]
+        cache["b"] = 2
+        with self.assertRaises(KeyError):
+            cache["a"]
+
+        self.assertEqual(
+            get_value("via_memo_cache_events_total", cache="test_metrics", event="hit"),
+            1,
+        )
+        self.assertEqual(
+            get_value(
+                "via_memo_cache_events_total", cache="test_metrics", event="miss"
+            ),
+            1,
+        )
+        self.assertEqual(
+            get_value(
+                "via_memo_cache_events_total", cache="test_metrics", event="eviction"
+            ),
+            1,
+        )
+        self.assertEqual(get_value("via_memo_cache_entries", cache="test_metrics"), 1)
@@ -0,0 +1,72 @@
+import os
+
+from unittest import TestCase, skipUnless
+
+from mock import patch
+
+from via.db import db
+from via.models.journey import Journey
+from via.models.point import FramePoint
+from via.caches.region_cache import (
+    RegionCache,
+    get_cell_id,
+    get_geocoder,
+    get_regions,
+)
+
+from ..utils import wipe_mongo
+
+
+IS_ACTION = os.environ.get("IS_ACTION", "False") == "True"
+
+
+class RegionCacheTest(TestCase):
+    def setUp(self):
+        wipe_mongo()
+
+    def tearDown(self):
+        wipe_mongo()
+
+    def test_get_cell_id(self):
+        self.assertEqual(get_cell_id(53.3498, -6.2603), get_cell_id(53.3491, -6.2609))
+        self.assertNotEqual(
+            get_cell_id(53.3498, -6.2603), get_cell_id(53.3598, -6.2603)
+        )
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_get_many(self):
+        cache = RegionCache()
+        places = cache.get_many([(53.3498, -6.2603), (53.3491, -6.2609)])
+        self.assertEqual(places[0]["place_2"], "Leinster")
+        self.assertIs(places[0], places[1])
+        self.assertEqual(db.regions.count_documents({}), 1)
+
+        # Another process gets it from mongo
+        self.assertEqual(RegionCache().get(53.3498, -6.2603)["place_2"], "Leinster")
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_get_regions(self):
+        journeys = []
+        for idx in range(1000):
+            journey = Journey()
+            journey.append(
+                FramePoint(0, {"lat": 53.3498 + (idx % 5) / 1000, "lng": -6.2603}, 1)
+            )
+            journey.append(FramePoint(1, {"lat": 53.3335, "lng": -6.2489}, 1))
+            journeys.append(journey)
+        journeys.append(Journey())
+
+        geocoder = get_geocoder()
+        with patch("via.caches.region_cache.region_cache", RegionCache()):
+            with patch.object(geocoder, "query", wraps=geocoder.query) as query:
+                regions = get_regions(journeys)
+                self.assertEqual(regions[:-1], ["Leinster"] * 1000)
+                self.assertEqual(regions[-1], None)
+
+                # One query for all the cells not seen before, the origins
+                # are in two cells and the destinations in one
+                self.assertEqual(query.call_count, 1)
+                self.assertEqual(len(query.call_args[0][0]), 3)
+
+                self.assertEqual(get_regions(journeys), regions)
+                self.assertEqual(query.call_count, 1)
@@ -5,6 +5,7 @@ from shutil import copyfile, rmtree
 
 from unittest import TestCase, skip, skipUnless
 
+from via.settings import GEOJSON_FILENAME_PREFIX
 from via.geojson.generate import generate_geojson
 
 from via.db import db
@@ -30,7 +31,7 @@ class GeoJsonGenerateTest(TestCase):
     def test_generate_geojson(self):
         generate_geojson("bike")
 
-        filename_pattern = re.compile("^test_")
+        filename_pattern = re.compile(f"^{GEOJSON_FILENAME_PREFIX}")
 
         data = db.gridfs.find_one(
             {"metadata.journey_type": "bike", "filename": filename_pattern}
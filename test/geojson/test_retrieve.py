@@ -3,8 +3,10 @@ import datetime
 
 from unittest import TestCase, skip, skipUnless
 
+import ujson
+
 from via.settings import GEOJSON_FILENAME_PREFIX
-from via.geojson.retrieve import get_geojson
+from via.geojson.retrieve import get_geojson, get_latest_geojson, parse_bbox
 from via.db import db
 
 from ..utils import wipe_mongo
@@ -67,3 +69,82 @@ class GeoJsonRetrieveTest(TestCase):
             filename=GEOJSON_FILENAME_PREFIX + "_something",
         )
         self.assertIsNotNone(get_geojson("bike"))
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_get_latest_geojson_stale(self):
+        for days, name in [(20, "older"), (10, "old")]:
+            save_time = (
+                datetime.datetime.utcnow() - datetime.timedelta(days=days)
+            ).timestamp()
+            db.gridfs.put(
+                ujson.dumps({"name": name}).encode("utf8"),
+                metadata={
+                    "journey_type": "bike",
+                    "geojson_place": None,
+                    "save_time": save_time,
+                },
+                filename=GEOJSON_FILENAME_PREFIX + "_something",
+            )
+
+        data, latest_save_time = get_latest_geojson("bike")
+        self.assertEqual(data, {"name": "old"})
+        self.assertEqual(latest_save_time, save_time)
+
+        with self.assertRaises(LookupError):
+            get_latest_geojson("bike", max_age=60 * 60)
+        with self.assertRaises(LookupError):
+            get_latest_geojson("bike", place="somewhere")
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_get_geojson_bbox(self):
+        def line(lng, lat):
+            return {
+                "type": "Feature",
+                "geometry": {
+                    "type": "LineString",
+                    "coordinates": [[lng, lat], [lng + 0.001, lat + 0.001]],
+                },
+                "properties": {"lng": lng},
+            }
+
+        data = {
+            "journey_type": "bike",
+            "geojson_place": None,
+            "save_time": (
+                datetime.datetime.utcnow() - datetime.timedelta(minutes=10)
+            ).timestamp(),
+        }
+        db.gridfs.put(
+            ujson.dumps(
+                {
+                    "type": "FeatureCollection",
+                    "features": [line(-6.3, 53.3), line(-6.2, 53.3), line(-8.4, 51.9)],
+                }
+            ).encode("utf8"),
+            metadata=data,
+            filename=GEOJSON_FILENAME_PREFIX + "_something",
+        )
+
+        self.assertEqual(len(get_geojson("bike")["features"]), 3)
+        self.assertEqual(
+            [
+                feature["properties"]["lng"]
+                for feature in get_geojson("bike", bbox=(-6.5, 53.0, -6.0, 53.5))[
+                    "features"
+                ]
+            ],
+            [-6.3, -6.2],
+        )
+        self.assertEqual(
+            get_geojson("bike", bbox=(0, 0, 1, 1)),
+            {"type": "FeatureCollection", "features": []},
+        )
+
+    def test_parse_bbox(self):
+        self.assertEqual(parse_bbox("-6.5,53,-6,53.5"), (-6.5, 53.0, -6.0, 53.5))
+        with self.assertRaises(ValueError):
+            parse_bbox("1,2,3")
+        with self.assertRaises(ValueError):
+            parse_bbox("a,b,c,d")
+        with self.assertRaises(ValueError):
+            parse_bbox("1,1,0,0")
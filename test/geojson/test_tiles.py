@@ -0,0 +1,102 @@
+import os
+
+from unittest import TestCase, skipUnless
+
+import mapbox_vector_tile
+
+from via.geojson.tiles import (
+    CURRENT_TILES,
+    TILE_LAYER_NAME,
+    cut_tiles,
+    get_tile,
+    get_tiles_id,
+    lng_lat_to_tile,
+    store_tiles,
+    tile_bounds,
+)
+
+from ..utils import wipe_mongo
+
+IS_ACTION = os.environ.get("IS_ACTION", "False") == "True"
+
+GEOJSON = {
+    "type": "FeatureCollection",
+    "features": [
+        {
+            "type": "Feature",
+            "geometry": {
+                "type": "LineString",
+                "coordinates": [[-6.2603, 53.3498], [-6.2593, 53.3502]],
+            },
+            "properties": {"avg": 5, "name": ["Main St", "High St"], "gone": None},
+        }
+    ],
+}
+
+
+class TileMathTest(TestCase):
+    def test_lng_lat_to_tile(self):
+        self.assertEqual(lng_lat_to_tile(0, 0, 0), (0, 0))
+        self.assertEqual(lng_lat_to_tile(-6.2603, 53.3498, 10), (494, 331))
+        self.assertEqual(lng_lat_to_tile(180, -90, 2), (3, 3))
+
+    def test_tile_bounds(self):
+        min_x, min_y, max_x, max_y = tile_bounds(1, 0, 0)
+        self.assertAlmostEqual(min_x, -20037508.342789244)
+        self.assertAlmostEqual(min_y, 0)
+        self.assertAlmostEqual(max_x, 0)
+        self.assertAlmostEqual(max_y, 20037508.342789244)
+
+
+class CutTilesTest(TestCase):
+    def test_cut_tiles(self):
+        tiles = cut_tiles(GEOJSON, min_zoom=10, max_zoom=12)
+
+        self.assertIn((10, 494, 331), tiles)
+        self.assertEqual({z for z, _, _ in tiles}, {10, 11, 12})
+
+        decoded = mapbox_vector_tile.decode(tiles[(10, 494, 331)])
+        [feature] = decoded[TILE_LAYER_NAME]["features"]
+        self.assertEqual(feature["properties"], {"avg": 5, "name": "Main St, High St"})
+        self.assertEqual(feature["geometry"]["type"], "LineString")
+
+    def test_cut_tiles_empty(self):
+        self.assertEqual(cut_tiles({"type": "FeatureCollection", "features": []}), {})
+
+
+class StoreTilesTest(TestCase):
+    def setUp(self):
+        wipe_mongo()
+        get_tiles_id.cache_clear()
+        CURRENT_TILES.clear()
+
+    def tearDown(self):
+        wipe_mongo()
+        get_tiles_id.cache_clear()
+        CURRENT_TILES.clear()
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_store_get_tile(self):
+        with self.assertRaises(LookupError):
+            get_tile("bike", 10, 494, 331)
+        get_tiles_id.cache_clear()
+
+        meta = {"journey_type": "bike", "geojson_place": None}
+        store_tiles(cut_tiles(GEOJSON, min_zoom=10, max_zoom=10), meta)
+        store_tiles(cut_tiles(GEOJSON, min_zoom=10, max_zoom=10), meta)
+
+        self.assertIsNotNone(get_tile("bike", 10, 494, 331))
+        self.assertIsNone(get_tile("bike", 10, 0, 0))
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_only_latest_tiles_kept(self):
+        meta = {"journey_type": "bike", "geojson_place": None}
+        store_tiles(cut_tiles(GEOJSON, min_zoom=10, max_zoom=10), meta)
+        self.assertIsNotNone(get_tile("bike", 10, 494, 331))
+
+        store_tiles({}, meta)
+        get_tiles_id.cache_clear()
+        self.assertIsNone(get_tile("bike", 10, 494, 331))
+
+        self.assertEqual(list(CURRENT_TILES.keys()), [("bike", None)])
+        self.assertEqual(CURRENT_TILES[("bike", None)][0], get_tiles_id("bike"))
@@ -45,3 +45,6 @@ class FrameTest(TestCase):
         )
         with self.assertRaises(NotImplementedError):
             Frame.parse(None)
+
+    def test_slots(self):
+        self.assertFalse(hasattr(Frame(0.0, {"lat": 0.0, "lng": 1.0}, 1.0), "__dict__"))
@@ -47,3 +47,11 @@ class GPSPointTest(TestCase):
         self.assertEqual(
             GPSPoint.parse([1, 2]).serialize(), {"lat": 1, "lng": 2, "elevation": None}
         )
+
+    def test_slots(self):
+        gps = GPSPoint(1, 2)
+        self.assertFalse(hasattr(gps, "__dict__"))
+
+        content_hash = gps.content_hash
+        self.assertEqual(gps._content_hash, content_hash)
+        self.assertEqual(gps.content_hash, content_hash)
@@ -3,6 +3,8 @@ import json
 import os
 from packaging import version
 
+import numpy
+
 from mock import patch
 from unittest import TestCase, skip, skipUnless
 
@@ -10,6 +12,7 @@ from via.utils import get_combined_id
 from via.models.journey import Journey
 from via.models.frame import Frame
 from via.models.point import FramePoint
+from via.validation import raw_data_to_arrays
 
 from ..utils import wipe_mongo
 
@@ -39,6 +42,113 @@ class JourneyTest(TestCase):
     def tearDown(self):
         wipe_mongo()
 
+    def test_context_ranges(self):
+        journey = Journey()
+        for idx in range(10):
+            journey.append(Frame(idx, {"lat": 1 + idx * 0.0001, "lng": 1}, 1))
+
+        self.assertIsNone(journey.context_ranges(1))
+
+        journey.set_contexts()
+        self.assertIsNone(journey.context_ranges(0))
+        self.assertEqual(journey.context_ranges(1), (range(0, 1), range(2, 3)))
+        self.assertEqual(journey.context_ranges(5), (range(2, 5), range(6, 9)))
+        self.assertEqual(journey.context_ranges(8), (range(7, 8), range(9, 10)))
+        self.assertIsNone(journey.context_ranges(9))
+
+        self.assertEqual([p.time for p in journey[5].context_pre], [2, 3, 4])
+        self.assertEqual([p.time for p in journey[5].context_post], [6, 7, 8])
+
+        # Not recalculated until contexts are set again
+        journey.append(Frame(10, {"lat": 1.002, "lng": 1}, 1))
+        self.assertEqual(journey.context_ranges(8), (range(7, 8), range(9, 10)))
+        journey.set_contexts()
+        self.assertEqual(journey.context_ranges(8), (range(6, 8), range(9, 11)))
+
+    def test_context_width(self):
+        journey = Journey(context_width=1)
+        for idx in range(4):
+            journey.append(Frame(idx, {"lat": 1 + idx * 0.0001, "lng": 1}, 1))
+        journey.set_contexts()
+
+        self.assertEqual(journey.context_ranges(2), (range(1, 2), range(3, 4)))
+
+    def test_point_metrics(self):
+        # Compare with points given the same context to work out themselves
+        for idx, point in enumerate(self.test_journey):
+            standalone = FramePoint(
+                point.time, point.gps, list(point.acceleration), slow=point._slow
+            )
+            ranges = self.test_journey.context_ranges(idx)
+            if ranges is not None:
+                standalone.set_context(
+                    pre=[FramePoint(p.time, p.gps, []) for p in point.context_pre],
+                    post=[FramePoint(p.time, p.gps, []) for p in point.context_post],
+                )
+
+            self.assertEqual(point.speed, standalone.speed)
+            self.assertEqual(type(point.speed), type(standalone.speed))
+            self.assertEqual(point.slow, standalone.slow)
+            self.assertEqual(point.road_quality, standalone.road_quality)
+
+            if point.speed is None:
+                self.assertTrue(numpy.isnan(self.test_journey.speeds[idx]))
+            else:
+                self.assertEqual(self.test_journey.speeds[idx], point.speed)
+            self.assertEqual(self.test_journey.slow_flags[idx], point.slow)
+            self.assertEqual(self.test_journey.road_qualities[idx], point.road_quality)
+
+    def test_point_metrics_not_moving(self):
+        journey = Journey()
+        for idx in range(7):
+            journey.append(FramePoint(idx, {"lat": 1, "lng": 1}, [0.5]))
+        journey.set_contexts()
+
+        self.assertEqual(journey[3].speed, 0)
+        self.assertIsInstance(journey[3].speed, int)
+        self.assertFalse(journey[3].slow)
+        self.assertEqual(journey.road_qualities.tolist(), [50] * 7)
+
+    def test_from_raw(self):
+        raw_data = [{"time": 0, "gps": [None, None], "acc": 0.5}]
+        for point in self.test_data:
+            raw_data.append(
+                {"time": point["time"], "gps": [point["lat"], point["lng"]], "acc": 0.1}
+            )
+            raw_data.append({"time": point["time"] + 0.1, "gps": [0, 0], "acc": None})
+            raw_data.append({"time": point["time"] + 0.2, "gps": [0, 0], "acc": 0.2})
+
+        for ratio in [1, 2]:
+            with patch("via.settings.GPS_INCLUDE_RATIO", ratio):
+                appended = Journey(data=raw_data)
+                journey = Journey.from_raw(data=raw_data, transport_type="bike")
+
+            self.assertEqual(journey.transport_type, "bike")
+            self.assertEqual(
+                journey.serialize(include_context=False)["data"],
+                appended.serialize(include_context=False)["data"],
+            )
+            self.assertEqual([p.slow for p in journey], [p.slow for p in appended])
+            self.assertEqual(journey.bad_speed, appended.bad_speed)
+            self.assertEqual(journey.gps_inclusion_iter, appended.gps_inclusion_iter)
+
+    def test_from_raw_arrays(self):
+        raw_data = [
+            {"time": point["time"], "gps": [point["lat"], point["lng"]], "acc": 0.1}
+            for point in self.test_data
+        ]
+        self.assertEqual(
+            Journey.from_raw(data=raw_data_to_arrays(raw_data)).serialize()["data"],
+            Journey(data=raw_data).serialize()["data"],
+        )
+
+    def test_from_raw_not_raw(self):
+        data = self.test_journey.serialize()["data"]
+        self.assertEqual(
+            Journey.from_raw(data=data).serialize()["data"],
+            Journey(data=data).serialize()["data"],
+        )
+
     def test_set_contexts(self):
         self.assertEqual(
             [i.is_context_populated for i in self.test_journey],
@@ -630,6 +740,44 @@ class JourneyTest(TestCase):
         #    0.0
         # )
 
+    def test_split(self):
+        self.assertEqual(self.test_journey.split(), [self.test_journey])
+
+        max_area = self.test_journey.area / 10
+        segments = self.test_journey.split(max_area=max_area)
+        self.assertGreater(len(segments), 1)
+
+        owned = []
+        for segment in segments:
+            self.assertLessEqual(segment.area, max_area)
+            owned.extend(segment._owned_pairs)
+        self.assertEqual(len(owned), len(self.test_journey) - 1)
+
+        # Both ends of each pair keep their context, so speed, at the seams
+        idx = 0
+        for segment in segments:
+            for pair in segment._owned_pairs:
+                self.assertEqual(
+                    segment[pair].speed, self.test_journey[idx].speed, (idx, pair)
+                )
+                self.assertEqual(
+                    segment[pair + 1].speed,
+                    self.test_journey[idx + 1].speed,
+                    (idx, pair),
+                )
+                idx += 1
+
+    def test_serialize_compact(self):
+        data = self.test_journey.serialize(compact=True)
+        self.assertLess(
+            len(json.dumps(data)), len(json.dumps(self.test_journey.serialize())) / 4
+        )
+
+        journey = Journey.parse(data)
+        self.assertEqual(len(journey), len(self.test_journey))
+        self.assertEqual(journey.serialize(), self.test_journey.serialize())
+        self.assertEqual(journey.content_hash, self.test_journey.content_hash)
+
     @patch("via.models.journey.Journey.__len__", return_value=100)
     @patch("via.models.journey.Journey.get_indirect_distance", return_value=1000)
     @patch("via.models.journey.Journey.duration", 10)
@@ -782,6 +930,33 @@ class JourneyTest(TestCase):
             )
         self.assertEqual(int(test_journey.get_avg_speed()), 4942)
 
+    def test_path_metrics(self):
+        test_journey = Journey()
+        for i in range(10):
+            test_journey.append(FramePoint(i * 20, {"lat": i / 1000, "lng": 0}, 1))
+
+        metrics = test_journey._get_path_metrics()
+        self.assertEqual(metrics["duration"], 180)
+        self.assertTrue(metrics["has_enough_data"])
+        self.assertIs(test_journey._get_path_metrics(), metrics)
+        self.assertEqual(int(test_journey.get_indirect_distance()), 1000)
+
+        test_journey.append(FramePoint(200, {"lat": 0.01, "lng": 0}, 1))
+        self.assertIsNot(test_journey._get_path_metrics(), metrics)
+        self.assertEqual(int(test_journey.get_indirect_distance()), 1111)
+        self.assertEqual(int(test_journey.get_indirect_distance(n_seconds=40)), 1111)
+
+    def test_has_enough_data_no_time(self):
+        test_journey = Journey()
+        for i in range(10):
+            test_journey.append(FramePoint(None, {"lat": i / 1000, "lng": 0}, 1))
+        self.assertTrue(test_journey.has_enough_data)
+
+        test_journey = Journey()
+        for i in range(9):
+            test_journey.append(FramePoint(None, {"lat": i / 1000, "lng": 0}, 1))
+        self.assertFalse(test_journey.has_enough_data)
+
     def test_timestamp_none(self):
         test_journey = Journey()
         self.assertEqual(test_journey.timestamp, None)
@@ -61,6 +61,22 @@ class JourneysTest(TestCase):
         self.assertEqual(self.test_journeys.most_eastern, -6.2523619)
         self.assertEqual(self.test_journeys.most_western, -6.2661022)
 
+    def test_summary(self):
+        summary = self.test_journeys.summary
+        self.assertEqual(summary.count, len(self.test_journey) * 2)
+        self.assertEqual(summary.north, self.test_journey.most_northern)
+        self.assertEqual(
+            self.test_journeys.time_range,
+            (self.test_data[0]["time"], self.test_data[-1]["time"]),
+        )
+        self.assertEqual(self.test_journeys.bbox, self.test_journey.bbox)
+
+    def test_summary_empty(self):
+        self.assertEqual(Journeys().summary.count, 0)
+        self.assertEqual(Journeys().time_range, (None, None))
+        with self.assertRaises(ValueError):
+            Journeys().bbox
+
     @skipUnless(not IS_ACTION, "action_mongo")
     @patch("via.settings.MIN_METRES_PER_SECOND", 0)
     @patch("via.settings.GPS_INCLUDE_RATIO", 1)
@@ -91,7 +107,7 @@ class JourneysTest(TestCase):
             for dp in data:
                 journey.append(dp)
 
-        self.assertEqual(journeys.content_hash, "d751713988987e9331980363e24189ce")
+        self.assertEqual(journeys.content_hash, "cae66941d9efbd404e4d88758ea67670")
 
     def test_extend(self):
         journeys = Journeys()
@@ -1,5 +1,6 @@
 from unittest import TestCase, skip, skipUnless
 
+from via.models.gps import GPSPoint
 from via.models.point import FramePoint, FramePoints, Context
 
 from ..utils import wipe_mongo
@@ -41,6 +42,14 @@ class FramePointTest(TestCase):
             },
         )
 
+    def test_slots(self):
+        point = FramePoint(10, {"lat": 1, "lng": 2}, [1, 2])
+        self.assertFalse(hasattr(point, "__dict__"))
+
+        content_hash = point.content_hash
+        self.assertEqual(point._content_hash, content_hash)
+        self.assertEqual(point.content_hash, content_hash)
+
     def test_speed_no_context(self):
         no_context = FramePoint.parse(
             {"time": 10, "gps": {"lat": 1, "lng": 1}, "acc": [1, 2, 3, 4]}
@@ -167,4 +176,41 @@ class FramePointsTest(TestCase):
                 {"time": 30, "gps": {"lat": 5, "lng": 6}, "acc": [1, 2, 3, 4]}
             )
         )
-        self.assertEqual(points.content_hash, "cc89534832eec0c531038b1beade9b93")
+        self.assertEqual(points.content_hash, "3db2b4e3ad35bd98c51202835b4301f2")
+
+        gps_hash = points.gps_hash
+        points.append({"time": 40, "gps": {"lat": 7, "lng": 8}, "acc": [1]})
+        self.assertNotEqual(points.gps_hash, gps_hash)
+
+    def test_points_stored_in_columns(self):
+        points = FramePoints()
+        points.append({"time": 10, "gps": {"lat": 1, "lng": 2}, "acc": [1, 2]})
+        points.append({"time": 20, "gps": {"lat": 3, "lng": 4}, "acc": [3]})
+
+        self.assertEqual(len(points), 2)
+        self.assertEqual(points.columns.lat.tolist(), [1, 3])
+        self.assertEqual(points.duration, 10)
+
+    def test_views(self):
+        points = FramePoints()
+        points.append({"time": 10, "gps": {"lat": 1, "lng": 2}, "acc": [1, 2]})
+        points.append({"time": 20, "gps": {"lat": 3, "lng": 4}, "acc": [3]})
+
+        self.assertIsNot(points[0], points[-2])
+        self.assertEqual(points[0].uuid, points[-2].uuid)
+        self.assertNotEqual(points[0].uuid, points[1].uuid)
+        self.assertEqual(points[0].acceleration, [1, 2])
+
+        points[0].append_acceleration(5)
+        self.assertEqual(points.columns.get_acceleration(0), [1, 2, 5])
+        self.assertEqual(points[0].acceleration, [1, 2, 5])
+
+        with self.assertRaises(AttributeError):
+            points[0].gps = GPSPoint(5, 6)
+        with self.assertRaises(AttributeError):
+            points[0].time = 30
+
+    def test_getitem_out_of_range(self):
+        points = FramePoints()
+        with self.assertRaises(IndexError):
+            points[0]
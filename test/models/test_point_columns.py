@@ -0,0 +1,120 @@
+import math
+from unittest import TestCase
+
+from via.models.point_columns import PointColumns, PointSummary, INITIAL_CAPACITY
+
+
+class PointColumnsTest(TestCase):
+    def test_append(self):
+        columns = PointColumns()
+        self.assertEqual(columns.append(10, 1, 2, None, [1, 2]), 0)
+        self.assertEqual(columns.append(None, 3, 4, 5, [], slow=True), 1)
+
+        self.assertEqual(len(columns), 2)
+        self.assertEqual(columns.get(0), (10, 1, 2, None, [1, 2], None))
+        self.assertEqual(columns.get(1), (None, 3, 4, 5, [], True))
+        self.assertTrue(math.isnan(columns.time[1]))
+
+    def test_grows(self):
+        columns = PointColumns()
+        for idx in range(INITIAL_CAPACITY * 3):
+            columns.append(idx, idx, idx, None, [idx] * 3)
+
+        self.assertEqual(len(columns), INITIAL_CAPACITY * 3)
+        self.assertEqual(columns.get_time(INITIAL_CAPACITY * 2), INITIAL_CAPACITY * 2)
+        self.assertEqual(columns.get_acceleration(20), [20, 20, 20])
+        self.assertEqual(len(columns.acc), INITIAL_CAPACITY * 9)
+
+    def test_append_acceleration(self):
+        columns = PointColumns()
+        columns.append(10, 1, 2, None, [1])
+        columns.append(20, 3, 4, None, [2])
+
+        columns.append_acceleration(1, 3)
+        columns.append_acceleration(0, 4)
+
+        self.assertEqual(columns.get_acceleration(0), [1, 4])
+        self.assertEqual(columns.get_acceleration(1), [2, 3])
+        self.assertEqual(columns.acc_offsets.tolist(), [0, 2, 4])
+
+    def test_get_position(self):
+        columns = PointColumns()
+        columns.append(10, None, None, None, [])
+        self.assertEqual(columns.get_position(0), (None, None, None))
+
+    def test_slice(self):
+        columns = PointColumns()
+        columns.append(10, 1, 2, None, [1, 2])
+        columns.append(20, 3, 4, 5, [3])
+        columns.append(30, 5, 6, 7, [4, 5])
+
+        sliced = columns.slice(1, 3)
+        self.assertEqual(len(sliced), 2)
+        self.assertEqual(sliced.get(0), columns.get(1))
+        self.assertEqual(sliced.get(1), columns.get(2))
+        self.assertEqual(sliced.acc_offsets.tolist(), [0, 1, 3])
+        self.assertEqual(sliced.summary.south, 3)
+
+    def test_serialize(self):
+        columns = PointColumns()
+        columns.append(10, 1, 2, None, [1, 2])
+        columns.append(None, 3, 4, 5, [], slow=True)
+
+        data = columns.serialize()
+        self.assertEqual(data["time"], [10, None])
+        self.assertEqual(data["slow"], [None, True])
+        self.assertEqual(data["acc_offsets"], [0, 2, 2])
+
+        parsed = PointColumns.parse(data)
+        self.assertEqual(len(parsed), 2)
+        self.assertEqual(parsed.get(0), columns.get(0))
+        self.assertEqual(parsed.get(1), columns.get(1))
+
+        parsed = PointColumns.parse(columns.serialize(include_time=False))
+        self.assertEqual(parsed.get_time(0), None)
+
+    def test_summary(self):
+        columns = PointColumns()
+        columns.append(10, 1, 5, None, [])
+        columns.append(None, 3, 4, None, [])
+        columns.append(5, None, None, None, [])
+
+        summary = columns.summary
+        self.assertEqual(summary.count, 3)
+        self.assertEqual(summary.bbox, {"north": 3, "south": 1, "east": 5, "west": 4})
+        self.assertEqual(summary.time_range, (5, 10))
+
+        from_arrays = PointColumns.from_arrays(
+            columns.time,
+            columns.lat,
+            columns.lng,
+            columns.elevation,
+            columns.slow,
+            columns.acc,
+            columns.acc_offsets,
+        ).summary
+        self.assertEqual(from_arrays.count, 3)
+        self.assertEqual(from_arrays.bbox, summary.bbox)
+        self.assertEqual(from_arrays.time_range, summary.time_range)
+
+
+class PointSummaryTest(TestCase):
+    def test_combine(self):
+        summary = PointSummary()
+        summary.add(1, 50, -6)
+        other = PointSummary()
+        other.add(2, 51, -7)
+
+        combined = PointSummary.combine([summary, other, PointSummary()])
+        self.assertEqual(combined.count, 2)
+        self.assertEqual(
+            combined.bbox, {"north": 51, "south": 50, "east": -6, "west": -7}
+        )
+        self.assertEqual(combined.time_range, (1, 2))
+
+    def test_empty(self):
+        summary = PointSummary.combine([])
+        self.assertEqual(summary.count, 0)
+        self.assertEqual(summary.time_range, (None, None))
+        with self.assertRaises(ValueError):
+            summary.get_bound("north")
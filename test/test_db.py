@@ -0,0 +1,145 @@
+import datetime
+import os
+
+from unittest import TestCase, skipUnless
+
+from bson import ObjectId
+
+from via.db import db
+
+from .utils import wipe_mongo
+
+
+IS_ACTION = os.environ.get("IS_ACTION", "False") == "True"
+
+
+class DBTest(TestCase):
+    def setUp(self):
+        wipe_mongo()
+
+    def tearDown(self):
+        wipe_mongo()
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_ensure_indexes_removes_duplicates(self):
+        db.raw_journeys.insert_one({"uuid": "one", "order": 1})
+        db.raw_journeys.insert_one({"uuid": "one", "order": 2})
+        db.raw_journeys.insert_one({"uuid": "two", "order": 3})
+
+        db.ensure_indexes()
+
+        self.assertEqual(db.raw_journeys.count_documents({}), 2)
+        self.assertEqual(db.raw_journeys.find_one({"uuid": "one"})["order"], 1)
+        self.assertTrue(
+            any(
+                index["key"] == [("uuid", 1)] and index.get("unique", False)
+                for index in db.raw_journeys.index_information().values()
+            )
+        )
+
+        # Running again is fine
+        db.ensure_indexes()
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_insert_raw_journey(self):
+        db.ensure_indexes()
+
+        self.assertTrue(db.insert_raw_journey({"uuid": "one"}))
+        self.assertFalse(db.insert_raw_journey({"uuid": "one"}))
+        self.assertEqual(db.raw_journeys.count_documents({"uuid": "one"}), 1)
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_insert_raw_journeys(self):
+        db.ensure_indexes()
+        db.insert_raw_journey({"uuid": "one"})
+
+        self.assertEqual(
+            db.insert_raw_journeys(
+                [{"uuid": "one"}, {"uuid": "two"}, {"uuid": "two"}, {"uuid": "three"}]
+            ),
+            [False, True, False, True],
+        )
+        self.assertEqual(db.raw_journeys.count_documents({}), 3)
+        self.assertEqual(db.insert_raw_journeys([]), [])
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_iter_raw_journey_uuids(self):
+        for idx in range(5):
+            db.raw_journeys.insert_one(
+                {
+                    "_id": ObjectId.from_datetime(datetime.datetime(2023, 1, idx + 1)),
+                    "uuid": str(idx),
+                }
+            )
+        # Inserted without inserted_at so it comes from the _ids
+        db.ensure_indexes()
+
+        self.assertEqual(list(db.iter_raw_journey_uuids()), ["0", "1", "2", "3", "4"])
+        self.assertEqual(list(db.iter_raw_journey_uuids(limit=2)), ["0", "1"])
+        self.assertEqual(
+            list(db.iter_raw_journey_uuids(after="1", limit=2)), ["2", "3"]
+        )
+        self.assertEqual(
+            list(
+                db.iter_raw_journey_uuids(
+                    since=datetime.datetime(
+                        2023, 1, 4, tzinfo=datetime.timezone.utc
+                    ).timestamp()
+                )
+            ),
+            ["3", "4"],
+        )
+        with self.assertRaises(LookupError):
+            db.iter_raw_journey_uuids(after="nope")
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_iter_raw_journey_uuids_string_ids(self):
+        # Journeys pulled from other instances used to keep their _id as a
+        # string, which sorts before every ObjectId
+        db.raw_journeys.insert_one({"_id": "not an object id", "uuid": "bad_id"})
+        db.raw_journeys.insert_one(
+            {
+                "_id": str(ObjectId.from_datetime(datetime.datetime(2023, 1, 1))),
+                "uuid": "pulled",
+            }
+        )
+        for idx in range(3):
+            db.raw_journeys.insert_one(
+                {
+                    "_id": ObjectId.from_datetime(datetime.datetime(2023, 1, idx + 2)),
+                    "uuid": str(idx),
+                }
+            )
+        db.ensure_indexes()
+        db.insert_raw_journey({"uuid": "new"})
+
+        self.assertEqual(
+            list(db.iter_raw_journey_uuids()),
+            ["bad_id", "pulled", "0", "1", "2", "new"],
+        )
+        self.assertEqual(
+            list(db.iter_raw_journey_uuids(after="bad_id", limit=2)), ["pulled", "0"]
+        )
+        self.assertEqual(
+            list(db.iter_raw_journey_uuids(after="pulled")), ["0", "1", "2", "new"]
+        )
+        self.assertEqual(
+            list(
+                db.iter_raw_journey_uuids(
+                    since=datetime.datetime(
+                        2023, 1, 1, tzinfo=datetime.timezone.utc
+                    ).timestamp()
+                )
+            ),
+            ["pulled", "0", "1", "2", "new"],
+        )
+        self.assertEqual(
+            list(
+                db.iter_raw_journey_uuids(
+                    since=datetime.datetime(
+                        2023, 1, 3, tzinfo=datetime.timezone.utc
+                    ).timestamp()
+                )
+            ),
+            ["1", "2", "new"],
+        )
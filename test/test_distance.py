@@ -0,0 +1,62 @@
+from unittest import TestCase
+
+import numpy
+from haversine import haversine, Unit
+
+from via.distance import (
+    consecutive_distances,
+    path_distance,
+    path_distances,
+    sample_every,
+)
+
+
+class DistanceTest(TestCase):
+    def setUp(self):
+        self.lat = numpy.array([53.3498, 53.3501, 53.3510, 53.3520])
+        self.lng = numpy.array([-6.2603, -6.2610, -6.2620, -6.2631])
+        self.time = numpy.array([0, 1, numpy.nan, 10])
+
+    def test_consecutive_distances(self):
+        distances = consecutive_distances(self.lat, self.lng)
+        self.assertEqual(len(distances), 3)
+        for idx, distance in enumerate(distances):
+            self.assertAlmostEqual(
+                distance,
+                haversine(
+                    (self.lat[idx], self.lng[idx]),
+                    (self.lat[idx + 1], self.lng[idx + 1]),
+                    unit=Unit.METERS,
+                ),
+            )
+
+    def test_sample_every(self):
+        self.assertEqual(sample_every(self.time, 1).tolist(), [0, 1, 3])
+        self.assertEqual(sample_every(self.time, 5).tolist(), [0, 3])
+        self.assertEqual(sample_every(self.time, 30).tolist(), [0])
+        self.assertEqual(sample_every(numpy.array([numpy.nan]), 5).tolist(), [])
+
+    def test_sample_every_not_chronological(self):
+        self.assertEqual(
+            sample_every(numpy.array([0, 10, 5, 20, 12]), 5).tolist(), [0, 1, 3]
+        )
+
+    def test_path_distance(self):
+        distances = consecutive_distances(self.lat, self.lng)
+        self.assertAlmostEqual(
+            path_distance(self.lat, self.lng, self.time), distances.sum()
+        )
+        self.assertAlmostEqual(
+            path_distance(self.lat, self.lng, self.time, n_seconds=5),
+            consecutive_distances(self.lat[[0, 3]], self.lng[[0, 3]])[0],
+        )
+        self.assertEqual(path_distance(self.lat[:1], self.lng[:1], self.time[:1]), 0)
+
+    def test_path_distances(self):
+        distances = path_distances(self.lat, self.lng, self.time, [0, 1, 5, 30])
+        self.assertEqual(list(distances.keys()), [0, 1, 5, 30])
+        for n_seconds, distance in distances.items():
+            self.assertEqual(
+                distance,
+                path_distance(self.lat, self.lng, self.time, n_seconds=n_seconds),
+            )
@@ -0,0 +1,27 @@
+from unittest import TestCase
+
+import numpy
+
+from via.hashing import hash_arrays, hash_hashes, hash_values
+
+
+class HashingTest(TestCase):
+    def test_hash_arrays(self):
+        self.assertEqual(
+            hash_arrays(numpy.array([1.0, 2.0]), numpy.array([3.0])),
+            hash_arrays(numpy.array([1.0, 0.0, 2.0])[::2], numpy.array([3.0])),
+        )
+        self.assertNotEqual(
+            hash_arrays(numpy.array([1.0, 2.0]), numpy.array([3.0])),
+            hash_arrays(numpy.array([1.0]), numpy.array([2.0, 3.0])),
+        )
+        self.assertEqual(len(hash_arrays(numpy.array([numpy.nan]))), 32)
+
+    def test_hash_values(self):
+        self.assertEqual(hash_values([1, None]), hash_values([1.0, None]))
+        self.assertNotEqual(hash_values([1, None]), hash_values([None, 1]))
+
+    def test_hash_hashes(self):
+        first = hash_arrays(numpy.array([1.0]))
+        second = hash_arrays(numpy.array([2.0]))
+        self.assertNotEqual(hash_hashes([first, second]), hash_hashes([second, first]))
@@ -0,0 +1,148 @@
+import asyncio
+import os
+import time
+
+from unittest import TestCase, skipUnless
+
+from mock import patch
+
+from via import jobs
+from via.db import db
+
+from .utils import wipe_mongo
+
+
+IS_ACTION = os.environ.get("IS_ACTION", "False") == "True"
+
+
+class JobsTest(TestCase):
+    def setUp(self):
+        wipe_mongo()
+        if not IS_ACTION:
+            db.ensure_indexes()
+
+    def tearDown(self):
+        wipe_mongo()
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_enqueue_dedupe(self):
+        job = jobs.enqueue("thing", {"a": 1, "b": 2})
+        self.assertEqual(job["status"], jobs.JOB_PENDING)
+        self.assertEqual(jobs.enqueue("thing", {"b": 2, "a": 1})["_id"], job["_id"])
+        self.assertNotEqual(jobs.enqueue("thing", {"a": 2})["_id"], job["_id"])
+        self.assertEqual(db.jobs.count_documents({}), 2)
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_claim_complete(self):
+        job = jobs.enqueue("thing")
+
+        claimed = jobs.claim("worker_1")
+        self.assertEqual(claimed["_id"], job["_id"])
+        self.assertEqual(claimed["status"], jobs.JOB_RUNNING)
+        self.assertEqual(claimed["attempts"], 1)
+        self.assertIsNone(jobs.claim("worker_2"))
+
+        self.assertFalse(jobs.complete(claimed, "worker_2"))
+        self.assertTrue(jobs.complete(claimed, "worker_1"))
+        self.assertEqual(jobs.get_job(job["_id"])["status"], jobs.JOB_DONE)
+
+        # Can be queued again once done
+        self.assertNotEqual(jobs.enqueue("thing")["_id"], job["_id"])
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_expired_lease_reclaimed(self):
+        jobs.enqueue("thing")
+        claimed = jobs.claim("worker_1")
+        db.jobs.update_one(
+            {"_id": claimed["_id"]}, {"$set": {"lease_expires": time.time() - 1}}
+        )
+
+        reclaimed = jobs.claim("worker_2")
+        self.assertEqual(reclaimed["_id"], claimed["_id"])
+        self.assertEqual(reclaimed["attempts"], 2)
+        self.assertFalse(jobs.renew_lease(claimed, "worker_1"))
+        self.assertTrue(jobs.renew_lease(reclaimed, "worker_2"))
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    @patch("via.jobs.JOB_MAX_ATTEMPTS", 2)
+    def test_expired_lease_last_attempt(self):
+        job = jobs.enqueue("thing")
+        for worker in ["worker_1", "worker_2"]:
+            claimed = jobs.claim(worker)
+            self.assertEqual(claimed["_id"], job["_id"])
+            db.jobs.update_one(
+                {"_id": job["_id"]}, {"$set": {"lease_expires": time.time() - 1}}
+            )
+
+        self.assertIsNone(jobs.claim("worker_3"))
+        failed = jobs.get_job(job["_id"])
+        self.assertEqual(failed["status"], jobs.JOB_FAILED)
+        self.assertFalse(failed["active"])
+        self.assertEqual(failed["attempts"], 2)
+
+        # Can be queued again once failed
+        self.assertNotEqual(jobs.enqueue("thing")["_id"], job["_id"])
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    @patch("via.jobs.JOB_MAX_ATTEMPTS", 2)
+    def test_fail_retries(self):
+        job = jobs.enqueue("thing")
+
+        jobs.fail(jobs.claim("worker"), "worker", "oops")
+        self.assertEqual(jobs.get_job(job["_id"])["status"], jobs.JOB_PENDING)
+        # Not ready to retry yet
+        self.assertIsNone(jobs.claim("worker"))
+
+        db.jobs.update_one({"_id": job["_id"]}, {"$set": {"run_after": 0}})
+        jobs.fail(jobs.claim("worker"), "worker", "oops")
+        failed = jobs.get_job(job["_id"])
+        self.assertEqual(failed["status"], jobs.JOB_FAILED)
+        self.assertFalse(failed["active"])
+        self.assertEqual(failed["error"], "oops")
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_schedule(self):
+        # Not due on first call
+        self.assertIsNone(jobs.schedule("every", "thing", interval=60))
+        self.assertIsNone(jobs.schedule("every", "thing", interval=60))
+
+        db.jobs.update_one({"_id": "schedule_every"}, {"$set": {"next_run": 0}})
+        self.assertEqual(jobs.schedule("every", "thing", interval=60)["kind"], "thing")
+        self.assertIsNone(jobs.schedule("every", "thing", interval=60))
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_process_next_job(self):
+        calls = []
+
+        def handler(**kwargs):
+            calls.append(kwargs)
+
+        def broken(**kwargs):
+            raise Exception("broken")
+
+        handlers = {"thing": handler, "broken": broken}
+
+        self.assertFalse(jobs.process_next_job("worker", handlers))
+
+        job = jobs.enqueue("thing", {"a": 1})
+        self.assertTrue(jobs.process_next_job("worker", handlers))
+        self.assertEqual(calls, [{"a": 1}])
+        self.assertEqual(jobs.get_job(job["_id"])["status"], jobs.JOB_DONE)
+
+        job = jobs.enqueue("broken")
+        self.assertTrue(jobs.process_next_job("worker", handlers))
+        failed = jobs.get_job(job["_id"])
+        self.assertEqual(failed["error"], "broken")
+        self.assertIn("Traceback", failed["traceback"])
+
+    @skipUnless(not IS_ACTION, "action_mongo")
+    def test_wait_for_job(self):
+        job = jobs.enqueue("thing")
+        self.assertIsNone(
+            asyncio.run(jobs.wait_for_job(job["_id"], 0.1, poll_interval=0.05))
+        )
+
+        jobs.complete(jobs.claim("worker"), "worker")
+        self.assertEqual(
+            asyncio.run(jobs.wait_for_job(job["_id"], 0.1))["status"], jobs.JOB_DONE
+        )
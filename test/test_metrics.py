@@ -0,0 +1,61 @@
+from unittest import TestCase
+
+from prometheus_client import REGISTRY
+
+from via import metrics
+
+
+def get_value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTest(TestCase):
+    def test_time_stage(self):
+        count = get_value("via_stage_seconds_count", stage="test_stage")
+        errors = get_value("via_stage_errors_total", stage="test_stage")
+
+        with metrics.time_stage("test_stage"):
+            pass
+
+        with self.assertRaises(ValueError):
+            with metrics.time_stage("test_stage"):
+                raise ValueError()
+
+        self.assertEqual(
+            get_value("via_stage_seconds_count", stage="test_stage"), count + 2
+        )
+        self.assertEqual(
+            get_value("via_stage_errors_total", stage="test_stage"), errors + 1
+        )
+
+    def test_timed(self):
+        @metrics.timed("test_timed")
+        def func(a, b=1):
+            """doc"""
+            return a + b
+
+        count = get_value("via_stage_seconds_count", stage="test_timed")
+        self.assertEqual(func(1, b=2), 3)
+        self.assertEqual(func.__doc__, "doc")
+        self.assertEqual(
+            get_value("via_stage_seconds_count", stage="test_timed"), count + 1
+        )
+
+    def test_count_ingest(self):
+        created = get_value(
+            "via_ingested_journeys_total", endpoint="test", result="created"
+        )
+        metrics.count_ingest("test", 201)
+        metrics.count_ingest("test", 500)
+        self.assertEqual(
+            get_value("via_ingested_journeys_total", endpoint="test", result="created"),
+            created + 1,
+        )
+        self.assertEqual(
+            get_value("via_ingested_journeys_total", endpoint="test", result="500"), 1
+        )
+
+    def test_render(self):
+        body, content_type = metrics.render()
+        self.assertIn("text/plain", content_type)
+        self.assertIn(b"via_stage_seconds", body)
@@ -186,7 +186,7 @@ class UtilTest(TestCase):
             should_include_journey(journey, latest_time=datetime.datetime(2022, 1, 1))
         )
 
-        # area
+        # area, large journeys are split rather than excluded
         data = []
         for i in range(1000):
             if i % 5 == 0:
@@ -200,7 +200,8 @@ class UtilTest(TestCase):
         for dp in data:
             journey.append(dp)
 
-        self.assertFalse(should_include_journey(journey))
+        self.assertTrue(should_include_journey(journey))
+        self.assertGreater(len(journey.split()), 1)
 
         # enough data
         data = []
@@ -0,0 +1,115 @@
+import json
+
+from unittest import TestCase
+
+import numpy
+from mock import patch
+
+from via.validation import (
+    arrays_to_raw_data,
+    raw_data_to_arrays,
+    validate_journey_arrays,
+    validate_journey_data,
+)
+
+
+def get_data(count=20, step=0.0001, time_step=1):
+    return [
+        {"acc": 0.1, "gps": [53 + i * step, -6 + i * step], "time": i * time_step}
+        for i in range(count)
+    ]
+
+
+class ValidationTest(TestCase):
+    def test_raw_data_to_arrays(self):
+        arrays = raw_data_to_arrays(
+            [
+                {"acc": 0.1, "gps": [1, 2], "time": 0},
+                {"acc": None, "gps": {"lat": 3, "lng": 4}, "time": None},
+                {"acc": 0.3, "gps": [None, None]},
+            ]
+        )
+        self.assertEqual(arrays["lat"][:2].tolist(), [1, 3])
+        self.assertEqual(arrays["lng"][:2].tolist(), [2, 4])
+        self.assertEqual(arrays["time"][0], 0)
+        self.assertTrue(numpy.isnan(arrays["time"][1]))
+        self.assertTrue(numpy.isnan(arrays["time"][2]))
+        self.assertTrue(numpy.isnan(arrays["acc"][1]))
+        self.assertTrue(numpy.isnan(arrays["lat"][2]))
+
+    def test_valid(self):
+        validate_journey_data(get_data())
+
+    def test_real_journeys_valid(self):
+        for name in ["1", "2"]:
+            with open(f"test/resources/raw_journey_data/{name}.json") as json_file:
+                validate_journey_data(json.load(json_file)["data"])
+
+    def test_reversed_valid(self):
+        validate_journey_data(list(reversed(get_data())))
+
+    def test_no_data(self):
+        with self.assertRaises(ValueError):
+            validate_journey_data([])
+
+    def test_malformed(self):
+        with self.assertRaises(ValueError):
+            validate_journey_data([{"acc": 1, "gps": []}])
+        with self.assertRaises(ValueError):
+            validate_journey_data([{"gps": [1, 2]}])
+        with self.assertRaises(ValueError):
+            validate_journey_data([{"acc": "a", "gps": [1, 2]}])
+
+    def test_acc_not_finite(self):
+        arrays = raw_data_to_arrays(get_data())
+        for value in [numpy.nan, numpy.inf]:
+            acc = arrays["acc"].copy()
+            acc[3] = value
+            with self.assertRaises(ValueError):
+                validate_journey_arrays(
+                    arrays["time"], acc, arrays["lat"], arrays["lng"]
+                )
+
+    def test_not_enough_gps(self):
+        data = get_data()
+        for point in data[5:]:
+            point["gps"] = [0, 0]
+        with self.assertRaises(ValueError):
+            validate_journey_data(data)
+
+    def test_gps_out_of_range(self):
+        data = get_data()
+        data[3]["gps"] = [91, 0.1]
+        with self.assertRaises(ValueError):
+            validate_journey_data(data)
+
+    def test_not_chronological(self):
+        data = get_data()
+        data[3]["time"] = 100
+        with self.assertRaises(ValueError):
+            validate_journey_data(data)
+
+        # A little jitter is fine
+        data = get_data()
+        data[3]["time"] = 3.5
+        validate_journey_data(data)
+
+    @patch("via.settings.MAX_METRES_PER_SECOND", 10)
+    def test_too_fast(self):
+        # ~13m per point a second
+        validate_journey_data(get_data(time_step=2))
+        with self.assertRaises(ValueError):
+            validate_journey_data(get_data(time_step=1))
+
+    def test_mismatched_arrays(self):
+        with self.assertRaises(ValueError):
+            validate_journey_arrays(
+                numpy.zeros(2), numpy.zeros(2), numpy.zeros(3), numpy.zeros(3)
+            )
+
+    def test_arrays_to_raw_data(self):
+        data = [
+            {"acc": 0.1, "gps": [1.0, 2.0], "time": 0.0},
+            {"acc": None, "gps": [3.0, 4.0], "time": None},
+        ]
+        self.assertEqual(arrays_to_raw_data(**raw_data_to_arrays(data)), data)
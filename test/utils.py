@@ -13,5 +13,8 @@ def wipe_mongo():
     if not IS_ACTION:
         db.raw_journeys.drop()
         db.networks.drop()
+        db.sync_state.drop()
+        db.jobs.drop()
+        db.regions.drop()
         for i in db.gridfs.find({"filename": {"$regex": f'^{re.escape("test_")}'}}):
             db.gridfs.delete(i._id)